@@ -1,6 +1,9 @@
 # wuziqi_api/__init__.py
-from .core import WuziqiAPI, init, Runapi
+from .core import WuziqiAPI, init, Runapi, Runapi_batch, arunapi
+from .session import GameSession
+from .stats import SearchStats
 
 __version__ = "1.0.0"
 __author__ = "Feng-zimo"
-__all__ = ['WuziqiAPI', 'init', 'Runapi']
\ No newline at end of file
+__all__ = ['WuziqiAPI', 'init', 'Runapi', 'Runapi_batch', 'arunapi', 'GameSession',
+           'SearchStats']
\ No newline at end of file
@@ -0,0 +1,159 @@
+import numpy as np
+
+
+class BitBoard:
+    """
+    位棋盘
+    每个玩家的棋子用一个任意精度的Python整数表示，(r, c) 对应第 r * stride + c 位，
+    stride = cols + 1：每行末尾留一个恒为0的边界位，沿任何方向移位都不会跨行误连。
+    五连、成五点检测只需每个方向几次移位和按位与。
+    支持与NumPy数组相同的 board[r, c] 读写，可以直接替换搜索中使用的棋盘。
+    """
+
+    def __init__(self, rows=15, cols=15):
+        self.rows = rows
+        self.cols = cols
+        self.stride = cols + 1
+        self.bits = [0, 0, 0]  # bits[1] 为用户，bits[2] 为AI，bits[0] 不使用
+
+        # 与 WuziqiAPI.directions 顺序一致：竖、横、斜、反斜
+        self.shifts = (self.stride, 1, self.stride + 1, self.stride - 1)
+        self.full_mask = 0
+        for r in range(rows):
+            for c in range(cols):
+                self.full_mask |= 1 << (r * self.stride + c)
+
+        # start_masks[r * cols + c][d]：沿第d个方向经过(r, c)的所有五格窗口的起点
+        self._start_masks = []
+        for r in range(rows):
+            for c in range(cols):
+                masks = []
+                for dr, dc in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                    mask = 0
+                    for k in range(5):
+                        ni, nj = r - k * dr, c - k * dc
+                        if 0 <= ni < rows and 0 <= nj < cols:
+                            mask |= 1 << (ni * self.stride + nj)
+                    masks.append(mask)
+                self._start_masks.append(tuple(masks))
+
+    @classmethod
+    def from_array(cls, board):
+        """从 (rows, cols) 的NumPy棋盘构造位棋盘"""
+        rows, cols = board.shape
+        bitboard = cls(rows, cols)
+        bitboard.load(board)
+        return bitboard
+
+    def load(self, board):
+        """用NumPy棋盘或另一个位棋盘覆盖当前内容"""
+        if isinstance(board, BitBoard):
+            self.bits = list(board.bits)
+            return
+        self.bits = [0, 0, 0]
+        rows, cols = np.nonzero(board)
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            self.bits[int(board[r, c])] |= 1 << (r * self.stride + c)
+
+    def to_array(self):
+        """转换为 np.int8 棋盘"""
+        board = np.zeros((self.rows, self.cols), dtype=np.int8)
+        for player in (1, 2):
+            bits = self.bits[player]
+            while bits:
+                low = bits & -bits
+                r, c = divmod(low.bit_length() - 1, self.stride)
+                board[r, c] = player
+                bits ^= low
+        return board
+
+    def __array__(self, dtype=None, copy=None):
+        board = self.to_array()
+        return board if dtype is None else board.astype(dtype)
+
+    @property
+    def shape(self):
+        return (self.rows, self.cols)
+
+    def copy(self):
+        bitboard = BitBoard.__new__(BitBoard)
+        bitboard.__dict__.update(self.__dict__)
+        bitboard.bits = list(self.bits)
+        return bitboard
+
+    def __getitem__(self, key):
+        r, c = key
+        q = r * self.stride + c
+        if self.bits[1] >> q & 1:
+            return 1
+        if self.bits[2] >> q & 1:
+            return 2
+        return 0
+
+    def __setitem__(self, key, player):
+        if key is Ellipsis:
+            self.load(player)
+            return
+        r, c = key
+        bit = 1 << (r * self.stride + c)
+        self.bits[1] &= ~bit
+        self.bits[2] &= ~bit
+        if player:
+            self.bits[player] |= bit
+
+    def item(self, index):
+        """按一维下标 r * cols + c 读取，与 ndarray.item 相同"""
+        r, c = divmod(index, self.cols)
+        return self[r, c]
+
+    def count(self):
+        """棋子总数"""
+        return bin(self.bits[1] | self.bits[2]).count("1")
+
+    def empty(self):
+        """空位的位图"""
+        return self.full_mask & ~(self.bits[1] | self.bits[2])
+
+    @staticmethod
+    def _fives(bits, d):
+        """沿位移d连续五子的起点位图"""
+        pairs = bits & (bits >> d)
+        fours = pairs & (pairs >> (2 * d))
+        return fours & (bits >> (4 * d))
+
+    def has_five(self, player):
+        """棋盘上是否有该玩家的五连"""
+        bits = self.bits[player]
+        return any(self._fives(bits, d) for d in self.shifts)
+
+    def is_five_at(self, r, c, player):
+        """经过(r, c)是否有该玩家的五连"""
+        bits = self.bits[player]
+        masks = self._start_masks[r * self.cols + c]
+        for d, mask in zip(self.shifts, masks):
+            if self._fives(bits, d) & mask:
+                return True
+        return False
+
+    def winning_cells(self, player):
+        """该玩家落子即可成五的空位位图"""
+        bits = self.bits[player]
+        empty = self.empty()
+        cells = 0
+        for d in self.shifts:
+            shifted = [bits >> (k * d) for k in range(5)]
+            for gap in range(5):
+                starts = empty >> (gap * d)
+                for k in range(5):
+                    if k != gap:
+                        starts &= shifted[k]
+                cells |= starts << (gap * d)
+        return cells
+
+    def winning_move(self, player):
+        """按行优先顺序返回第一个成五点（1索引），没有时返回None"""
+        cells = self.winning_cells(player)
+        if not cells:
+            return None
+        r, c = divmod((cells & -cells).bit_length() - 1, self.stride)
+        return (r + 1, c + 1)
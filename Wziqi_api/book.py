@@ -0,0 +1,109 @@
+import os
+import struct
+
+import numpy as np
+
+# 文件头：魔数、版本、行数、列数、条目的最大棋子数、槽位数、条目数
+_MAGIC = b"WZQBOOK\0"
+_VERSION = 2
+_HEADER = struct.Struct("<8sIIIIII")
+
+# 一个槽位：局面的规范哈希，规范局面中AI的着法（1索引）、搜索深度，以及槽位是否已占用
+# （空棋盘的哈希为0，不能用 key == 0 表示空槽）
+BOOK_ENTRY_DTYPE = np.dtype([('key', '<u8'), ('row', 'u1'), ('col', 'u1'),
+                             ('depth', 'u1'), ('used', 'u1')])
+
+
+class OpeningBook:
+    """
+    开局库
+    保存轮到AI（棋盘值2）走时局面到最佳着法的映射。局面按对称变换下的规范形式
+    （见 symmetry.canonical）保存，旋转、翻转后相同的局面共用一个条目。
+    文件为固定大小的开放寻址哈希表（线性探测，装载率不超过1/2），
+    载入时用 np.memmap 只读映射，不需要把整个文件读入内存，按哈希 O(1) 查询；
+    多个进程打开同一个文件时共用操作系统的页缓存。
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 开局库文件路径（由 book_builder.build_book 生成）
+        """
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"不是开局库文件: {path}")
+        magic, version, rows, cols, max_stones, capacity, count = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"不是开局库文件或版本不符: {path}")
+        self.path = path
+        self.rows = rows
+        self.cols = cols
+        self.max_stones = max_stones  # 条目中最多的棋子数，棋子更多的局面不必查询
+        self.count = count
+        self.mask = capacity - 1
+        self.entries = np.memmap(path, dtype=BOOK_ENTRY_DTYPE, mode="r",
+                                 offset=_HEADER.size, shape=(capacity,))
+        self._keys = self.entries['key']
+        self._used = self.entries['used']
+
+    def __len__(self):
+        return self.count
+
+    def __getstate__(self):
+        # 传给其他进程时只传路径，在对方进程中重新映射
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def close(self):
+        """释放文件映射"""
+        self.entries = self._keys = self._used = None
+
+    def probe(self, key):
+        """
+        按规范哈希查询开局库
+        Returns:
+            tuple: (行, 列, 搜索深度)，着法在规范局面中；未命中时返回None
+        """
+        index = key & self.mask
+        while self._used.item(index):
+            if self._keys.item(index) == key:
+                entry = self.entries[index]
+                return int(entry['row']), int(entry['col']), int(entry['depth'])
+            index = (index + 1) & self.mask
+        return None
+
+    def items(self):
+        """全部条目：(key, (行, 列, 搜索深度))"""
+        for entry in self.entries[self._used != 0]:
+            yield int(entry['key']), (int(entry['row']), int(entry['col']),
+                                      int(entry['depth']))
+
+
+def write_book(path, entries, rows=15, cols=15, max_stones=0):
+    """
+    把条目写成开局库文件
+    Args:
+        entries: dict，规范哈希 -> (规范局面中的行, 列, 搜索深度)
+        max_stones: 条目中最多的棋子数
+    """
+    capacity = 1
+    while capacity < 2 * max(len(entries), 1):
+        capacity <<= 1
+    mask = capacity - 1
+    table = np.zeros(capacity, dtype=BOOK_ENTRY_DTYPE)
+    for key, (row, col, depth) in entries.items():
+        index = key & mask
+        while table['used'][index]:
+            index = (index + 1) & mask
+        table[index] = (key, row, col, depth, 1)
+
+    # 先写到临时文件再替换，正在映射旧文件的进程不受影响
+    temp = f"{path}.tmp"
+    with open(temp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, rows, cols, max_stones, capacity,
+                             len(entries)))
+        table.tofile(f)
+    os.replace(temp, path)
@@ -0,0 +1,119 @@
+import argparse
+import os
+
+import numpy as np
+
+from .book import OpeningBook, write_book
+from .symmetry import canonical_key, to_canonical
+
+
+def build_book(path, positions=None, plies=4, user_replies=6, search_depth=4,
+               time_limit_ms=None, workers=None, **kwargs):
+    """
+    离线生成或扩充开局库
+    从给定的起始局面出发逐层展开：轮到AI的局面用进程池并行做深度搜索并记入开局库，
+    AI走出这一步后，再按着法排序取用户最可能的几种应对，得到下一层轮到AI的局面。
+    文件已存在时在原有条目上扩充，同一局面保留搜索更深的结果。
+    Args:
+        path: 开局库文件路径
+        positions: 轮到AI走的起始局面，元素为 Runapi 接受的任意棋盘格式；
+                   None表示空棋盘（AI先手）和用户下在天元后（AI后手）两种
+        plies: 从起始局面起AI最多走几步
+        user_replies: 每个局面展开的用户应对数
+        search_depth: 搜索深度
+        time_limit_ms: 每个局面的思考时限（毫秒），None表示按固定深度搜索
+        workers: 进程数，None表示CPU核数
+        **kwargs: 传给 WuziqiAPI 的其余参数（行数、列数等）
+    Returns:
+        int: 开局库的条目数
+    """
+    from .core import WuziqiAPI
+    from .parallel import BatchPool
+
+    api = WuziqiAPI(search_depth=search_depth, **kwargs)
+    rows, cols = api.rows, api.cols
+
+    entries = {}
+    max_stones = 0
+    if os.path.exists(path):
+        book = OpeningBook(path)
+        if (book.rows, book.cols) != (rows, cols):
+            raise ValueError(f"开局库的棋盘大小为 {book.rows}x{book.cols}")
+        entries = dict(book.items())
+        max_stones = book.max_stones
+        book.close()
+
+    if positions is None:
+        center = np.zeros((rows, cols), dtype=np.int8)
+        center[rows // 2, cols // 2] = 1
+        positions = [np.zeros((rows, cols), dtype=np.int8), center]
+    level = [api._parse_board(QiPan).copy() for QiPan in positions]
+
+    pool = BatchPool(workers, dict(kwargs, search_depth=search_depth))
+    try:
+        for _ in range(plies):
+            # 同一层中重复或互为对称的局面只搜索一次
+            unique = {}
+            for board in level:
+                unique.setdefault(canonical_key(board)[0], board)
+            level = []
+            boards = list(unique.values())
+            for index, move in pool.run(boards, search_depth, time_limit_ms):
+                if isinstance(move, Exception):
+                    raise move
+                if move is None:
+                    continue
+                board = boards[index].copy()
+                stones = int(np.count_nonzero(board))
+                # 前两子由 _opening_move 的固定规则处理，不必记入开局库
+                if not api._is_opening(board):
+                    key, t = canonical_key(board)
+                    old = entries.get(key)
+                    if old is None or old[2] <= search_depth:
+                        entries[key] = (to_canonical(move, t, rows, cols)
+                                        + (search_depth,))
+                    max_stones = max(max_stones, stones)
+
+                board[move[0] - 1, move[1] - 1] = 2
+                if api._is_game_over_numpy(board):
+                    continue
+                for row, col in _user_replies(api, board, stones + 1, user_replies):
+                    child = board.copy()
+                    child[row - 1, col - 1] = 1
+                    if not api._is_game_over_numpy(child, (row - 1, col - 1)):
+                        level.append(child)
+    finally:
+        pool.close()
+
+    write_book(path, entries, rows, cols, max_stones)
+    return len(entries)
+
+
+def _user_replies(api, board, stones, count):
+    """按着法排序取用户最可能的几种应对（1索引）"""
+    api._init_search_state(board)
+    api._init_ordering_state(stones, 1)
+    moves = api._candidate_moves(board, stones)
+    return api._order_moves(moves, 1, 0)[:count]
+
+
+def main(argv=None):
+    """命令行入口：python -m Wziqi_api.book_builder 开局库文件 [选项]"""
+    parser = argparse.ArgumentParser(description="生成或扩充五子棋开局库")
+    parser.add_argument("path", help="开局库文件路径，已存在时在其上扩充")
+    parser.add_argument("--plies", type=int, default=4, help="AI最多走几步")
+    parser.add_argument("--replies", type=int, default=6, help="每个局面展开的用户应对数")
+    parser.add_argument("--depth", type=int, default=4, help="搜索深度")
+    parser.add_argument("--time-limit", type=int, default=None, help="每个局面的思考时限（毫秒）")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认为CPU核数")
+    parser.add_argument("--size", type=int, default=15, help="棋盘大小")
+    args = parser.parse_args(argv)
+
+    count = build_book(args.path, plies=args.plies, user_replies=args.replies,
+                       search_depth=args.depth, time_limit_ms=args.time_limit,
+                       workers=args.workers, rows=args.size, cols=args.size)
+    print(f"开局库共 {count} 个局面: {args.path}")
+
+
+if __name__ == "__main__":
+    main()
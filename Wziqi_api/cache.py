@@ -0,0 +1,101 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    跨调用的最佳着法缓存
+    以 (引擎配置, 局面的规范哈希, 行棋方) 为键，保存搜索完成的深度、被时限截断时的时限、
+    最佳着法（规范局面中）和分数。查询时更深的结果也可以回答较浅的请求；
+    因时限而中止的结果可以回答时限不超过它的请求。
+    按最近使用顺序淘汰（LRU），占用的内存（估算）不超过 max_bytes。
+    多个线程、多个引擎可以共用同一个缓存；配置不同的引擎各自使用自己的条目。
+    """
+
+    def __init__(self, max_bytes=32 << 20):
+        """
+        Args:
+            max_bytes: 内存上限（字节），按条目中各对象的 sys.getsizeof 估算
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """命中统计：dict，含 hits、misses、hit_rate、entries、nbytes"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+            'nbytes': self.nbytes,
+        }
+
+    def clear(self):
+        """清空缓存和命中统计"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = self.misses = 0
+
+    def get(self, config, key, side, depth, time_limit_ms=None):
+        """
+        查询缓存
+        Args:
+            config: 引擎配置（可哈希），包含棋盘大小和影响所选着法的设置。
+                    不同大小的棋盘的Zobrist键互有重叠，设置不同时同一局面的着法
+                    也可能不同，都不能共用条目
+            key: 局面的规范哈希
+            side: 行棋方
+            depth: 请求的搜索深度（限时搜索时为深度上限）
+            time_limit_ms: 请求的时限，None表示按固定深度搜索
+        Returns:
+            tuple: (规范局面中的着法, 分数)，未命中时返回None
+        """
+        cache_key = (config, key, side)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                entry_depth, entry_time, move, score, _ = entry
+                if entry_depth >= depth or (time_limit_ms is not None
+                                            and entry_time is not None
+                                            and entry_time >= time_limit_ms):
+                    self._entries.move_to_end(cache_key)
+                    self.hits += 1
+                    return move, score
+            self.misses += 1
+            return None
+
+    def store(self, config, key, side, depth, time_limit_ms, move, score):
+        """
+        写入缓存，已有同一局面更深的结果时保留旧结果
+        Args:
+            depth: 搜索完成的深度
+            time_limit_ms: 搜索因该时限而提前结束时为时限，否则为None
+        """
+        cache_key = (config, key, side)
+        with self._lock:
+            old = self._entries.get(cache_key)
+            if old is not None:
+                if old[0] > depth:
+                    self._entries.move_to_end(cache_key)
+                    return
+                self.nbytes -= old[4]
+            # 键、着法等对象本身，加上值元组、字典槽位和链表节点的开销（约200字节）；
+            # 配置对象由同一引擎的所有条目共用，不计入
+            size = (sys.getsizeof(cache_key) + sys.getsizeof(key) + sys.getsizeof(move)
+                    + sys.getsizeof(score) + 2 * sys.getsizeof(move[0]) + 200)
+            self._entries[cache_key] = (depth, time_limit_ms, move, score, size)
+            self._entries.move_to_end(cache_key)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted[4]
@@ -1,123 +1,1070 @@
+import asyncio
+import atexit
 import copy
+import logging
+import os
+import threading
 import time
 import numpy as np
 from collections import defaultdict
 from functools import lru_cache
+from operator import itemgetter
+
+from .bitboard import BitBoard
+from .book import OpeningBook
+from .cache import ResultCache
+from .parallel import BatchPool, LazySMPPool, RootSearchPool
+from .stats import SearchStats
+from .symmetry import (canonical, canonical_key, from_canonical, symmetric_cell_keys,
+                       symmetric_keys, to_canonical)
+from .threats import ThreatSolver
+from .transposition import (EXACT, LOWER, UPPER, SharedTranspositionTable,
+                            TranspositionTable, zobrist_keys)
+
+
+logger = logging.getLogger(__name__)
+
+
+class _SearchTimeout(Exception):
+    """搜索到达时限时在搜索树内部抛出，由迭代加深捕获"""
+
+
+class _StopFlag:
+    """线程间的停止标志，与 multiprocessing.RawValue 一样通过 value 读写"""
+    
+    def __init__(self):
+        self.value = 0
+
+# 着法排序用的威胁分，按 [连子数][活端数] 索引：连子数为在该点落子后经过它的
+# 连续同色棋子数（5及以上按5计），活端数为两端空位的个数
+_ATTACK_SCORES = (
+    (0, 0, 0),
+    (0, 1, 2),
+    (0, 10, 100),                # 眠二、活二
+    (0, 100, 1000),              # 眠三、活三
+    (0, 1000, 10000),            # 冲四、活四
+    (100000, 100000, 100000),    # 五连
+)
+# 防守分：在对方的威胁点落子，分值为对方进攻分的一半
+_DEFENSE_SCORES = tuple(tuple(score // 2 for score in row) for row in _ATTACK_SCORES)
+# 威胁分达到该值（冲四、活三或挡住对方的活四、五连）的着法排在杀手着法之前
+_FORCING_THREAT = 1000
+# 限时计算中威胁空间搜索阶段至多使用的剩余时间比例，其余留给迭代加深
+_THREAT_TIME_SHARE = 0.5
+
+
+# 棋型表：评估窗口的5个格子按4进制编码，第k格乘以4**k，
+# 格子取值 0 空位、1 用户、2 AI、3 棋盘外
+_EDGE = 3
+_PATTERN_WEIGHTS = tuple(4 ** k for k in range(5))
+
+
+def _line_score(line, player):
+    """
+    计算单个窗口对某个玩家的得分，规则与 _evaluate_position 和
+    _check_patterns_numpy 相同，只用于生成棋型表
+    """
+    score = 0
+    count = 0
+    blocks = 0
+    empty_before = False
+    empty_after = False
+    for k, cell in enumerate(line):
+        if cell == _EDGE:
+            blocks += 1
+            break
+        if cell == player:
+            count += 1
+        elif cell == 0:
+            if k == 0:
+                empty_before = True
+            else:
+                empty_after = True
+                break
+        else:
+            blocks += 1
+            break
+    
+    if count == 5:
+        score += 100000  # 五连
+    elif count == 4:
+        score += (10000, 1000, 0)[blocks]  # 活四、冲四
+    elif count == 3:
+        score += (100, 10, 0)[blocks]      # 活三、冲三
+    elif count == 2:
+        if blocks == 0:
+            score += 5      # 活二
+    elif count == 1:
+        if empty_before and empty_after:
+            score += 1      # 单子价值
+    
+    if count >= 3:
+        player_count = line.count(player)
+        empty_count = line.count(0)
+        if player_count == 3 and empty_count == 2:
+            score += 50  # 跳三
+        elif player_count == 2 and empty_count == 3:
+            score += 20  # 跳二
+    return score
+
+
+def _build_pattern_table():
+    """
+    预计算全部 4**5 种窗口编码的得分
+    Returns:
+        ndarray: 形状为 (1024, 2)，[code] 为 (AI得分, 用户得分)
+    """
+    table = np.zeros((4 ** 5, 2), dtype=np.int64)
+    for code in range(4 ** 5):
+        line = [code // weight % 4 for weight in _PATTERN_WEIGHTS]
+        table[code] = _line_score(line, 2), _line_score(line, 1)
+    return table
+
+
+_PATTERN_TABLE = _build_pattern_table()
+# 增量评估逐个查表，Python列表比索引ndarray快
+_AI_PATTERN_SCORES = _PATTERN_TABLE[:, 0].tolist()
+_USER_PATTERN_SCORES = _PATTERN_TABLE[:, 1].tolist()
+
+
+@lru_cache(maxsize=None)
+def _cell_windows(rows, cols, directions):
+    """
+    预计算经过每个格子的评估窗口
+    窗口即 _evaluate_position 从起点沿某方向检查的5个位置，编号为
+    (r * cols + c) * 4 + d。某格的落子/撤销只会影响经过它的至多20个窗口。
+    Returns:
+        tuple: 下标为 r * cols + c，元素为 (w, 该格在窗口编码中的权重) 的元组
+    """
+    cells = [[] for _ in range(rows * cols)]
+    for r in range(rows):
+        for c in range(cols):
+            for d, (dr, dc) in enumerate(directions):
+                w = (r * cols + c) * 4 + d
+                for k in range(5):
+                    ni, nj = r + k * dr, c + k * dc
+                    if not (0 <= ni < rows and 0 <= nj < cols):
+                        break
+                    cells[ni * cols + nj].append((w, _PATTERN_WEIGHTS[k]))
+    return tuple(tuple(windows) for windows in cells)
+
+
+@lru_cache(maxsize=None)
+def _cell_keys(rows, cols):
+    """
+    预计算棋盘字典的键
+    Returns:
+        tuple: (按行优先顺序的 "行,列" 键, 键 -> 一维下标 r * cols + c 的字典)
+    """
+    keys = tuple(f"{i},{j}" for i in range(1, rows + 1) for j in range(1, cols + 1))
+    return keys, {key: p for p, key in enumerate(keys)}
+
+
+# 落子方与棋盘值的对应，与棋盘字典 QiPan 中的取值相同
+_PLAYERS = {"users": 1, "api": 2}
+
+
+def _add_move(QiPan, row, col, cols, who="api"):
+    """
+    把引擎的落子（1索引）写回调用方传入的棋盘
+    字典写入落子方who（"api" 或 "users"），数组和可写缓冲区写入对应的棋盘值，
+    着法列表追加该着法：按位置交替能推出落子方时追加 (行, 列)，
+    否则（或列表已经使用三元组时）追加 (行, 列, 落子方)；bytes 等只读输入不修改
+    """
+    if isinstance(QiPan, dict):
+        QiPan[f"{row},{col}"] = who
+    elif isinstance(QiPan, list):
+        implied = "users" if len(QiPan) % 2 == 0 else "api"
+        if (QiPan and len(QiPan[-1]) == 3) or implied != who:
+            QiPan.append((row, col, who))
+        else:
+            QiPan.append((row, col))
+    elif not isinstance(QiPan, (tuple, bytes)):
+        if isinstance(QiPan, np.ndarray):
+            board = QiPan
+        else:
+            board = np.frombuffer(QiPan, dtype=np.int8)
+        if not board.flags.writeable:
+            return
+        # 按下标直接写入原数组，不经过 reshape（不连续的数组 reshape 后是副本）
+        if board.ndim == 2:
+            board[row - 1, col - 1] = _PLAYERS[who]
+        else:
+            board[(row - 1) * cols + col - 1] = _PLAYERS[who]
+
+
+def _swap_players(board):
+    """
+    交换双方的棋子（1与2互换），返回新的棋盘
+    搜索、评估、置换表和开局库都以棋盘值2的一方为行棋方，
+    为另一方计算着法时先交换棋子，置换表中的条目因此也按行棋方的角度共用
+    """
+    if isinstance(board, BitBoard):
+        return BitBoard.from_array(_swap_players(board.to_array()))
+    return ((3 - np.asarray(board)) % 3).astype(np.int8)
+
+
+@lru_cache(maxsize=None)
+def _cell_neighbours(rows, cols, radius):
+    """
+    预计算每个格子邻域（切比雪夫距离不超过radius，不含自身）内的格子
+    Returns:
+        tuple: 下标为 r * cols + c，元素为邻域格子的一维下标
+    """
+    cells = []
+    for r in range(rows):
+        for c in range(cols):
+            cells.append(tuple(
+                ni * cols + nj
+                for ni in range(max(0, r - radius), min(rows, r + radius + 1))
+                for nj in range(max(0, c - radius), min(cols, c + radius + 1))
+                if (ni, nj) != (r, c)))
+    return tuple(cells)
+
 
 class WuziqiAPI:
-    def __init__(self, rows=15, cols=15, search_depth=3):
+    def __init__(self, rows=15, cols=15, search_depth=3, tt_size=1 << 18,
+                 incremental_eval=True, eval_backend="vectorized", batch_frontier=False,
+                 move_radius=2, shrink_radius_at=None, move_ordering=True, pvs=True,
+                 aspiration_window=2000, lmr_moves=None, lmr_depth=3, lmr_reduction=1,
+                 futility_margin=None, futility_depth=1, time_limit_ms=None,
+                 board_backend="numpy", threat_search="vcf", threat_depth=8,
+                 threat_nodes=5000, threat_time_ms=200, workers=1, parallel="root",
+                 opening_book=None, canonical_tt=False, result_cache=None,
+                 on_search=None):
         """
         初始化棋盘
         Args:
             rows: 行数
             cols: 列数
             search_depth: 搜索深度，默认为3
+            tt_size: 置换表最大条目数，为0时不使用置换表
+            incremental_eval: 搜索中是否使用增量评估（落子/撤销时只更新经过该点的窗口）
+            eval_backend: 整盘评估的实现，"vectorized"为NumPy向量化版本，
+                          "scalar"为逐格检查的原始版本，两者得分相同
+            batch_frontier: 深度为1的节点是否把所有子节点叠成 (N, rows, cols)
+                            的数组，一次向量化评估后直接取最大/最小值
+            move_radius: 候选着法的邻域半径（1或2），只考虑已有棋子附近的空位
+            shrink_radius_at: 棋子数达到该值后邻域半径缩小为1，None表示不缩小
+            move_ordering: 是否对候选着法排序（威胁评分、杀手着法和历史启发）
+            pvs: 是否使用主要变例搜索（PVS）：每个节点只有第一个子节点用完整窗口搜索，
+                 其余先用零窗口判断能否超过alpha，超过时才重新搜索
+            aspiration_window: 迭代加深时以上一轮的分数为中心、以此为半宽的渴望窗口，
+                               结果落在窗口之外时放开失败的一侧重新搜索；None表示不使用
+            lmr_moves: 后期着法减少深度（LMR）：剩余深度不小于 lmr_depth 的节点中，
+                       排序在前 lmr_moves 个以及置换表、威胁、杀手着法之后的着法
+                       先少搜 lmr_reduction 层，超过alpha时再按完整深度重新搜索；
+                       None表示不使用
+            lmr_depth: 使用LMR的最小剩余深度
+            lmr_reduction: LMR减少的层数
+            futility_margin: 无望剪枝（futility pruning）：剩余深度不超过 futility_depth
+                             的节点中，静态评估加上 futility_margin * 剩余深度仍不超过alpha时，
+                             不再搜索置换表、威胁、杀手着法以外的着法；None表示不使用
+            futility_depth: 使用无望剪枝的最大剩余深度
+            time_limit_ms: 默认的思考时限（毫秒），设置后使用迭代加深，
+                           search_depth 作为深度上限；None表示按固定深度搜索
+            board_backend: 搜索使用的棋盘，"numpy"为 np.int8 数组，
+                           "bitboard"为以Python整数按位保存的位棋盘（见BitBoard）
+            threat_search: 极大极小搜索之前的威胁空间搜索，"vcf"只走冲四，
+                           "vct"还可以走活三，None表示不使用。VCT的节点多、
+                           常常用完整个预算也找不到结果，会明显拖慢平静局面，
+                           因此默认只做VCF
+            threat_depth: 威胁空间搜索中进攻方最多走几步
+            threat_nodes: 每次威胁空间搜索的节点数上限
+            threat_time_ms: 威胁空间搜索阶段（含防守检查）的时间上限（毫秒）；
+                            限时计算时同时不超过剩余时间的一半，与迭代加深共用思考时限
+            workers: 并行搜索的进程数，大于1时使用进程池；用完后调用 close() 关闭
+            parallel: 多进程搜索方式，"root"把根着法分发到各进程，选出的着法与单进程相同；
+                      "smp"为Lazy SMP，各进程完整搜索同一局面并共用共享内存中的置换表
+            opening_book: 开局库文件路径或 OpeningBook 对象，None表示不使用；
+                          轮到AI走的局面在开局库中时直接使用其中的着法
+            canonical_tt: 置换表是否按对称变换下的规范形式存取，旋转、翻转后相同的局面
+                          共用条目。评估窗口在棋盘边缘并不完全对称，共用条目时分数可能
+                          与单独搜索略有差别，因此默认关闭
+            result_cache: 跨调用的结果缓存，为整数时新建以其为内存上限（字节）的
+                          ResultCache，也可以传入多个引擎共用的 ResultCache；None表示不使用
+            on_search: 每次计算出着法后调用的函数，参数为本次的 SearchStats
         """
+        if eval_backend not in ("vectorized", "scalar"):
+            raise ValueError(f"未知的评估实现: {eval_backend}")
+        if board_backend not in ("numpy", "bitboard"):
+            raise ValueError(f"未知的棋盘实现: {board_backend}")
+        if threat_search not in (None, "vcf", "vct"):
+            raise ValueError(f"未知的威胁搜索方式: {threat_search}")
+        if move_radius not in (1, 2):
+            raise ValueError(f"邻域半径只能为1或2: {move_radius}")
+        if workers < 1:
+            raise ValueError(f"进程数至少为1: {workers}")
+        if parallel not in ("root", "smp"):
+            raise ValueError(f"未知的并行方式: {parallel}")
         self.rows = rows
         self.cols = cols
         self.search_depth = search_depth
+        self.board_backend = board_backend
         self.directions = [(1, 0), (0, 1), (1, 1), (1, -1)]  # 横、竖、斜、反斜
         
         # 创建方向向量的NumPy数组以提高性能
         self.direction_arrays = [np.array(d) for d in self.directions]
         
+        # 棋盘字典的键及其一维下标，解析棋盘时不必逐个拆分字符串
+        self._cell_index = _cell_keys(rows, cols)[1]
+        
+        # Zobrist哈希键与置换表，跨多次调用保留
+        self._zobrist, self._side_key = zobrist_keys(rows, cols)
+        if not tt_size:
+            self.tt = None
+        elif workers > 1 and parallel == "smp":
+            self.tt = SharedTranspositionTable(tt_size)
+        else:
+            self.tt = TranspositionTable(tt_size)
+        
+        # 规范化置换表：增量维护棋盘在各对称变换下的哈希，取最小者作为键
+        self.canonical_tt = canonical_tt
+        self._sym_cell_keys = symmetric_cell_keys(rows, cols) if canonical_tt else None
+        self._sym_keys = None
+        
+        # 增量评估：每个窗口双方的得分及总分，在每次搜索开始时初始化
+        self.eval_backend = eval_backend
+        self.incremental_eval = incremental_eval
+        self.batch_frontier = batch_frontier
+        
+        # 候选着法：每个半径维护一份邻域棋子计数和候选空位集合，随落子/撤销增量更新
+        self.move_radius = move_radius
+        self.shrink_radius_at = shrink_radius_at
+        radii = {move_radius} | ({1} if shrink_radius_at is not None else set())
+        self._neighbours = {radius: _cell_neighbours(rows, cols, radius)
+                            for radius in radii}
+        self._near = {}
+        self._candidates = {}
+        self._move_tuples = [(i + 1, j + 1) for i in range(rows) for j in range(cols)]
+        
+        # 着法排序：带一圈边框（值为3）的一维棋盘用于快速沿线扫描；
+        # 杀手着法按层保存，历史得分在一次搜索内累积
+        self.move_ordering = move_ordering
+        self._stride = cols + 2
+        self._steps = tuple(dr * self._stride + dc for dr, dc in self.directions)
+        self._cells = None
+        self._killers = []
+        self._history = None
+        self._root_stones = 0
+        
+        # 主要变例搜索与迭代加深的渴望窗口
+        self.pvs = pvs
+        self.aspiration_window = aspiration_window
+        
+        # 选择性搜索：后期着法减少深度（LMR）与无望剪枝，依赖着法排序区分威胁着法
+        self.lmr_moves = lmr_moves
+        self.lmr_depth = lmr_depth
+        self.lmr_reduction = lmr_reduction
+        self.futility_margin = futility_margin
+        self.futility_depth = futility_depth
+        self._tactical_moves = 0
+        
+        # 迭代加深：时限（perf_counter时刻）与当前这一轮根节点的最佳着法；
+        # _stop 为其他进程设置的停止标志（带 value 属性），只在设置了时限时检查
+        self.time_limit_ms = time_limit_ms
+        self._deadline = None
+        self._stop = None
+        self._root_best = None
+        self._cell_windows = _cell_windows(rows, cols, tuple(self.directions))
+        self._codes = None
+        self._ai_total = self._user_total = 0
+        
+        # 威胁空间搜索（VCF/VCT）及其节点数、时间预算
+        self.threat_search = threat_search
+        self.threat_depth = threat_depth
+        self.threat_nodes = threat_nodes
+        self.threat_time_ms = threat_time_ms
+        self.threats = ThreatSolver(rows, cols) if threat_search else None
+        
+        # 开局库（离线深度搜索的结果，见 book.py）
+        if isinstance(opening_book, (str, os.PathLike)):
+            opening_book = OpeningBook(opening_book)
+        if (opening_book is not None
+                and (opening_book.rows, opening_book.cols) != (rows, cols)):
+            raise ValueError(f"开局库的棋盘大小为 {opening_book.rows}x{opening_book.cols}")
+        self.book = opening_book
+        
+        # 结果缓存：同一局面（含对称局面）再次请求时直接返回之前搜索的结果
+        if isinstance(result_cache, int):
+            result_cache = ResultCache(result_cache)
+        self.cache = result_cache
+        # 缓存的键包含棋盘大小和会改变所选着法的设置，设置不同的引擎共用缓存时互不干扰；
+        # 评估实现、增量评估和批量评估得分相同，并行方式不改变根着法，都不计入
+        self._cache_config = (
+            rows, cols, move_radius, shrink_radius_at, move_ordering, pvs,
+            aspiration_window, lmr_moves, lmr_depth, lmr_reduction, futility_margin,
+            futility_depth, threat_search, threat_depth, threat_nodes, threat_time_ms,
+            canonical_tt,
+            None if opening_book is None else os.fspath(opening_book.path))
+        self._result_depth = 0
+        self._result_score = None
+        
+        # 搜索统计：计数器在每次计算开始时清零，结束时汇总为 SearchStats（不含其他进程中的搜索）
+        self.on_search = on_search
+        self.stats = None
+        self.nodes = 0
+        self.evaluations = 0
+        self.cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.move_generations = 0
+        self.threat_searched = 0
+        self.reductions = 0
+        self.pruned = 0
+        self._depth_times = []
+        self._stage = "search"
+        
+        # 多进程搜索：进程池在第一次使用时创建，工作进程内的引擎使用相同的搜索参数；
+        # Lazy SMP 的工作进程改用共享置换表，不再创建自己的置换表
+        self.workers = workers
+        self.parallel = parallel
+        self._pool = None
+        self._pool_options = dict(
+            rows=rows, cols=cols, search_depth=search_depth,
+            tt_size=0 if parallel == "smp" else tt_size,
+            incremental_eval=incremental_eval, eval_backend=eval_backend,
+            batch_frontier=batch_frontier, move_radius=move_radius,
+            shrink_radius_at=shrink_radius_at, move_ordering=move_ordering, pvs=pvs,
+            aspiration_window=aspiration_window, lmr_moves=lmr_moves,
+            lmr_depth=lmr_depth, lmr_reduction=lmr_reduction,
+            futility_margin=futility_margin, futility_depth=futility_depth,
+            board_backend=board_backend, threat_search=None, canonical_tt=canonical_tt)
+    
+    def close(self):
+        """关闭多进程搜索的进程池，并释放共享置换表"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        if isinstance(self.tt, SharedTranspositionTable):
+            self.tt.close()
+            self.tt = None
+        
     def init_board(self):
         """
         创建初始棋盘字典
         Returns:
             QiPan: 初始化后的棋盘字典
         """
-        QiPan = {}
-        for i in range(1, self.rows + 1):
-            for j in range(1, self.cols + 1):
-                QiPan[f"{i},{j}"] = "None"
-        return QiPan
+        return dict.fromkeys(_cell_keys(self.rows, self.cols)[0], "None")
     
-    def Runapi(self, QiPan, auto_add=True, search_depth=None):
+    def Runapi(self, QiPan, auto_add=True, search_depth=None, time_limit_ms=None,
+               with_stats=False, who="api"):
         """
         AI计算下一步棋
         Args:
-            QiPan: 当前棋盘状态
+            QiPan: 当前棋盘状态，可以是棋盘字典或紧凑格式（见 _parse_board）
             auto_add: 是否自动将AI的落子添加到棋盘
-            search_depth: 搜索深度，如果为None则使用默认值
+            search_depth: 搜索深度，如果为None则使用默认值；设置时限时为深度上限
+            time_limit_ms: 思考时限（毫秒），如果为None则使用默认值
+            with_stats: 为True时同时返回本次的 SearchStats
+            who: 为哪一方计算，默认 "api"；为 "users" 时替用户一方下棋
         Returns:
-            dict: AI的落子位置
+            dict: 落子位置，值为落子方；with_stats 为True时为 (落子位置, SearchStats)
         """
         start_time = time.time()
         
-        # 使用指定的搜索深度或默认值
-        depth = search_depth if search_depth is not None else self.search_depth
-        
-        # 解析棋盘
-        board = self._parse_board(QiPan)
-        
-        # 寻找最佳移动
-        best_move = self._find_best_move(board, depth)
+        best_move = self._think(QiPan, search_depth, time_limit_ms, who)
         
+        result = {}
         if best_move:
             row, col = best_move
-            result = {f"{row},{col}": "api"}
+            result = {f"{row},{col}": who}
             
             # 如果auto_add为True，自动更新棋盘
             if auto_add:
-                QiPan[f"{row},{col}"] = "api"
+                _add_move(QiPan, row, col, self.cols, who)
             
-            print(f"AI思考时间: {time.time() - start_time:.2f}秒")
-            return result
-        else:
-            return {}
+            logger.info("AI思考时间: %.2f秒", time.time() - start_time,
+                        extra={"search_stats": self.stats})
+        return (result, self.stats) if with_stats else result
+    
+    async def arunapi(self, QiPan, auto_add=True, search_depth=None, time_limit_ms=None,
+                      executor=None, with_stats=False, who="api"):
+        """
+        AI计算下一步棋（asyncio版本）
+        搜索在执行器中运行，不阻塞事件循环。搜索按迭代加深进行：
+        调用 stop() 后尽快结束并返回已找到的最佳着法；
+        所在任务被取消时同样停止搜索，等搜索线程退出后继续抛出 CancelledError。
+        同一个实例同一时间只能进行一次搜索。
+        Args:
+            QiPan: 当前棋盘状态
+            auto_add: 是否自动将AI的落子添加到棋盘
+            search_depth: 搜索深度上限，如果为None则使用默认值
+            time_limit_ms: 思考时限（毫秒），如果为None则使用默认值
+            executor: 运行搜索的执行器，None表示事件循环默认的线程池
+            with_stats: 为True时同时返回本次的 SearchStats
+            who: 为哪一方计算，默认 "api"；为 "users" 时替用户一方下棋
+        Returns:
+            dict: 落子位置，值为落子方；with_stats 为True时为 (落子位置, SearchStats)
+        """
+        loop = asyncio.get_running_loop()
+        self._stop = _StopFlag()
+        future = loop.run_in_executor(executor, self._think, QiPan, search_depth,
+                                      time_limit_ms, who)
+        try:
+            best_move = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.stop()
+            await asyncio.wait([future])
+            raise
+        finally:
+            self._stop = None
+        
+        result = {}
+        if best_move:
+            row, col = best_move
+            if auto_add:
+                _add_move(QiPan, row, col, self.cols, who)
+            result = {f"{row},{col}": who}
+        return (result, self.stats) if with_stats else result
+    
+    def stop(self):
+        """让正在进行的 arunapi 搜索尽快结束，返回已找到的最佳着法"""
+        if self._stop is not None:
+            self._stop.value = 1
+            # 多进程搜索的工作进程读取进程池自己的停止标志
+            if self._pool is not None:
+                self._pool._stop.value = 1
+    
+    def _think(self, QiPan, search_depth=None, time_limit_ms=None, who="api"):
+        """
+        解析棋盘并为落子方who寻找最佳移动
+        Returns:
+            tuple: 1索引的 (行, 列)，没有可走的位置时返回None
+        """
+        if who not in _PLAYERS:
+            raise ValueError(f"未知的落子方: {who}")
+        # 使用指定的搜索深度或默认值
+        depth = search_depth if search_depth is not None else self.search_depth
+        if time_limit_ms is None:
+            time_limit_ms = self.time_limit_ms
+        
+        # 解析棋盘；替用户一方计算时交换双方棋子
+        board = self._parse_board(QiPan)
+        if who == "users":
+            board = _swap_players(board)
+        if self.board_backend == "bitboard":
+            board = BitBoard.from_array(board)
+        
+        # 寻找最佳移动
+        return self._find_best_move(board, depth, time_limit_ms)
     
     def _parse_board(self, QiPan):
-        """将棋盘字典转换为NumPy数组"""
+        """
+        将棋盘转换为NumPy数组（0为空，1为用户，2为AI）
+        支持的格式：
+            dict: 棋盘字典，键为 "行,列"，值为 "users"、"api" 或 "None"
+            np.ndarray 或支持缓冲区协议的对象（bytes、bytearray、memoryview等）：
+                按行优先每格一个值（0、1、2），形状须为 (rows, cols) 或 (rows * cols,)。
+                可写的 np.int8 数据直接使用、不复制，搜索中会临时落子，返回前恢复原状
+            list/tuple: 着法列表，元素为 (行, 列) 或 (行, 列, 落子方)，1索引；
+                只有 (行, 列) 时从用户开始双方交替
+        """
+        if isinstance(QiPan, dict):
+            return self._parse_dict(QiPan)
+        if isinstance(QiPan, (list, tuple)):
+            return self._parse_moves(QiPan)
+        
+        if isinstance(QiPan, np.ndarray):
+            board = QiPan
+        else:
+            board = np.frombuffer(QiPan, dtype=np.uint8).view(np.int8)
+        if board.shape not in ((self.rows, self.cols), (self.rows * self.cols,)):
+            raise ValueError(f"棋盘大小应为 {self.rows}x{self.cols}: {board.shape}")
+        # 在转换为 int8 之前检查，避免越界的值被截断成合法的值
+        if board.min() < 0 or board.max() > 2:
+            raise ValueError(f"棋盘的值只能是0、1、2: {board.min()}..{board.max()}")
+        if board.dtype != np.int8 or not board.flags.writeable:
+            board = board.astype(np.int8)
+        return board.reshape(self.rows, self.cols)
+    
+    def _parse_dict(self, QiPan):
+        """将棋盘字典转换为NumPy数组，标准的 "行,列" 键直接查预计算的下标"""
         # 使用NumPy数组提高性能
         board = np.zeros((self.rows, self.cols), dtype=np.int8)
+        flat = board.reshape(-1)
+        cell_index = self._cell_index
         
         for pos, player in QiPan.items():
-            row, col = map(int, pos.split(','))
             if player == "users":
-                board[row-1, col-1] = 1  # 用户为1
+                value = 1  # 用户为1
             elif player == "api":
-                board[row-1, col-1] = 2  # AI为2
-            # 空位置保持为0
+                value = 2  # AI为2
+            else:
+                continue  # 空位置保持为0
+            p = cell_index.get(pos)
+            if p is not None:
+                flat[p] = value
+            else:
+                # 带空格等非标准写法的键
+                row, col = map(int, pos.split(','))
+                board[row-1, col-1] = value
         
         return board
     
-    def _find_best_move(self, board, depth):
-        """寻找最佳移动"""
+    def _parse_moves(self, moves):
+        """将着法列表转换为NumPy数组"""
+        board = np.zeros((self.rows, self.cols), dtype=np.int8)
+        for n, move in enumerate(moves):
+            if len(move) == 3:
+                row, col, who = move
+                player = 1 if who == "users" else 2 if who == "api" else None
+                if player is None:
+                    raise ValueError(f"未知的落子方: {who}")
+            else:
+                row, col = move
+                player = 1 if n % 2 == 0 else 2
+            if not (1 <= row <= self.rows and 1 <= col <= self.cols):
+                raise ValueError(f"落子位置超出棋盘: {row},{col}")
+            if board[row-1, col-1]:
+                raise ValueError(f"该位置已有棋子: {row},{col}")
+            board[row-1, col-1] = player
+        return board
+    
+    def _find_best_move(self, board, depth, time_limit_ms=None, key=None, stones=None,
+                        fives=None):
+        """
+        寻找最佳移动
+        time_limit_ms 不为None时使用迭代加深：依次搜索深度1、2……直到depth，
+        到达时限即停止，返回最后一个完整搜索的深度得到的最佳着法。
+        时限从这里开始计算，威胁空间搜索和迭代加深共用这一个时限。
+        key 为None时根据棋盘重建增量状态并计算哈希；不为None时表示调用方
+        （GameSession）已经增量维护好了与棋盘一致的状态，且棋盘上没有五连；
+        stones（棋子数）和 fives（{玩家: 该玩家的一个成五点或None}）也由调用方
+        维护时可以一并传入，省去整盘的计数和扫描
+        计算结束后统计信息保存在 self.stats 中，并调用 on_search 回调
+        """
+        start = time.perf_counter()
+        deadline = None if time_limit_ms is None else start + time_limit_ms / 1000
+        self.nodes = self.evaluations = self.cutoffs = 0
+        self.tt_probes = self.tt_hits = self.move_generations = self.threat_searched = 0
+        self.reductions = self.pruned = 0
+        self._depth_times = []
+        
+        move = self._cached_best_move(board, depth, time_limit_ms, key, deadline,
+                                      stones, fives)
+        
+        searched = self._stage == "search"
+        self.stats = SearchStats(
+            move=move, stage=self._stage,
+            depth=self._result_depth if searched else None, score=self._result_score,
+            time_ms=(time.perf_counter() - start) * 1000,
+            nodes=self.nodes, evaluations=self.evaluations, cutoffs=self.cutoffs,
+            tt_probes=self.tt_probes, tt_hits=self.tt_hits,
+            move_generations=self.move_generations, depth_times=self._depth_times,
+            threat_nodes=self.threat_searched, reductions=self.reductions,
+            pruned=self.pruned)
+        if self.on_search is not None:
+            self.on_search(self.stats)
+        return move
+    
+    def _cached_best_move(self, board, depth, time_limit_ms=None, key=None,
+                          deadline=None, stones=None, fives=None):
+        """先查询结果缓存，未命中时搜索并把结果写入缓存"""
+        if self.cache is None:
+            return self._search_best_move(board, depth, key, deadline, stones, fives)
+        
+        # 结果缓存按规范哈希查询，对称的局面共用结果
+        cache_key, sym = canonical_key(board)
+        config = self._cache_config
+        hit = self.cache.get(config, cache_key, 2, depth, time_limit_ms)
+        if hit is not None:
+            self._stage, self._result_depth, self._result_score = "cache", None, hit[1]
+            return from_canonical(hit[0], sym, self.rows, self.cols)
+        
+        move = self._search_best_move(board, depth, key, deadline, stones, fives)
+        if move and self._result_depth > 0:
+            # 只有因时限而没有搜完的结果才记录时限；被 stop() 中止的结果只按完成的深度使用
+            cut_by_time = (time_limit_ms is not None and self._result_depth < depth
+                           and not (self._stop is not None and self._stop.value))
+            self.cache.store(config, cache_key, 2, self._result_depth,
+                             time_limit_ms if cut_by_time else None,
+                             to_canonical(move, sym, self.rows, self.cols),
+                             self._result_score)
+        return move
+    
+    def _search_best_move(self, board, depth, key=None, deadline=None, stones=None,
+                          fives=None):
+        """
+        _find_best_move 的搜索部分（不查询结果缓存）
+        deadline 为整个计算的 perf_counter 时限，None表示按固定深度搜索。
+        结束时 _result_depth 为完成的搜索深度、_result_score 为最佳分数；
+        不经搜索直接决定的着法（开局、开局库、成五、威胁空间搜索）与深度无关，深度记为无穷大
+        """
+        self._result_depth, self._result_score = float('inf'), None
+        if stones is None:
+            stones = int(np.count_nonzero(board))
+        
         # 如果是开局，选择中心附近
-        if self._is_opening(board):
+        if self._is_opening(board, stones):
+            self._stage = "opening"
             return self._opening_move(board)
         
+        # 开局库命中时直接使用离线深度搜索得到的着法
+        if self.book is not None:
+            book_move = self._book_move(board, stones)
+            if book_move:
+                self._stage = "book"
+                return book_move
+        
         # 检查是否有立即获胜的机会
-        winning_move = self._find_winning_move_numpy(board, 2)  # 2代表AI
+        if fives is not None:
+            winning_move = fives[2]
+        else:
+            winning_move = self._find_winning_move_numpy(board, 2)  # 2代表AI
         if winning_move:
+            self._stage = "win"
             return winning_move
         
         # 检查是否需要防守用户的获胜机会
-        defensive_move = self._find_winning_move_numpy(board, 1)  # 1代表用户
+        if fives is not None:
+            defensive_move = fives[1]
+        else:
+            defensive_move = self._find_winning_move_numpy(board, 1)  # 1代表用户
         if defensive_move:
+            self._stage = "defend"
             return defensive_move
         
-        # 使用Minimax算法搜索最佳移动
+        # 威胁空间搜索：找到连续冲四/活三取胜的路线时直接走第一步
+        threat_deadline = None
+        if self.threats is not None:
+            threat_ms = self.threat_time_ms
+            if deadline is not None:
+                threat_ms = min(threat_ms, (deadline - time.perf_counter()) * 1000
+                                * _THREAT_TIME_SHARE)
+            threat_deadline = time.perf_counter() + threat_ms / 1000
+            line = self._solve_threats(board, 2, threat_deadline)
+            if line:
+                self._stage = "threat"
+                return line[0]
+        
+        self._stage = "search"
+        if key is None:
+            self._init_search_state(board)
+        self._init_ordering_state(stones, depth)
+        
+        # 用户有连续取胜路线时，只在能化解它的着法中搜索
+        root_moves = None
+        if self.threats is not None:
+            root_moves = self._threat_defences(board, stones, threat_deadline)
+        
+        if key is None:
+            key = self._hash_board(board)
+            # 棋盘上已有五连时无法只检查最后一手，退回整盘扫描
+            track_last_move = not self._is_game_over_numpy(board)
+        else:
+            track_last_move = True
+        if self.tt is not None:
+            self.tt.new_search()
+        
+        if self.workers > 1 and self.parallel == "smp":
+            return self._search_smp(board, depth, key, stones, track_last_move,
+                                    root_moves, deadline)
+        # 可以被中途停止时也使用迭代加深，停止时返回已完成的最深一轮的结果
+        if deadline is None and self._stop is None:
+            start = time.perf_counter()
+            best_move, self._result_score = self._search_root(board, depth, key, stones,
+                                                              track_last_move,
+                                                              root_moves=root_moves)
+            self._result_depth = depth
+            self._depth_times.append((depth, (time.perf_counter() - start) * 1000,
+                                      self.nodes))
+            return best_move
+        return self._iterative_deepening(board, depth, deadline, key, stones,
+                                         track_last_move, root_moves)
+    
+    def _book_move(self, board, stones):
+        """查询开局库（按规范哈希），返回1索引着法，未命中时返回None"""
+        if stones > self.book.max_stones:
+            return None
+        key, t = canonical_key(board)
+        entry = self.book.probe(key)
+        if entry is None:
+            return None
+        row, col = from_canonical(entry[:2], t, self.rows, self.cols)
+        # 哈希碰撞时着法可能落在已有棋子上
+        if board[row - 1, col - 1]:
+            return None
+        return row, col
+    
+    def _search_smp(self, board, depth, key, stones, track_last_move, root_moves,
+                    deadline=None):
+        """Lazy SMP 多进程搜索（见LazySMPPool），deadline 为None时按固定深度搜索"""
+        if self._pool is None:
+            self._pool = LazySMPPool(self.workers, self._pool_options, self.tt)
+        time_limit_ms = None
+        if deadline is not None:
+            time_limit_ms = max(deadline - time.perf_counter(), 0) * 1000
+        elif self._stop is not None:
+            # 可以被中途停止时各进程也迭代加深，停止时返回已完成的最深一轮的结果
+            time_limit_ms = float('inf')
+        best_move, self._result_depth = self._pool.search(np.asarray(board), depth, key,
+                                                          stones, track_last_move,
+                                                          root_moves, time_limit_ms)
+        if best_move is None:
+            best_move = self._first_move(board, stones, root_moves)
+        return best_move
+    
+    def _first_move(self, board, stones, root_moves=None):
+        """搜索没有给出着法时使用排序最靠前的着法，没有可走的位置时返回None"""
+        moves = list(root_moves or self._candidate_moves(board, stones))
+        moves = self._order_moves(moves, 2, 0)
+        return moves[0] if moves else None
+    
+    def _solve_threats(self, board, player, deadline):
+        """在剩余时间内为该玩家做威胁空间搜索，返回取胜路线（1索引着法列表）或None"""
+        remaining_ms = (deadline - time.perf_counter()) * 1000
+        if remaining_ms <= 0:
+            return None
+        line = self.threats.solve(board, player, self.threat_depth,
+                                  self.threat_search == "vct", self.threat_nodes,
+                                  remaining_ms)
+        self.threat_searched += self.threats.nodes
+        return line
+    
+    def _threat_defences(self, board, stones, deadline):
+        """
+        检查用户是否有连续取胜的路线，有则按着法排序逐个尝试候选着法，
+        返回落子后用户不再有取胜路线的着法
+        Returns:
+            list: 能化解的着法；用户没有取胜路线、或预算内没有找到化解着法时返回None
+        """
+        if not self._solve_threats(board, 1, deadline):
+            return None
+        
+        defences = []
+        for move in self._order_moves(self._candidate_moves(board, stones), 2, 0):
+            if time.perf_counter() >= deadline:
+                break
+            r, c = move[0] - 1, move[1] - 1
+            board[r, c] = 2
+            line = self._solve_threats(board, 1, deadline)
+            board[r, c] = 0
+            if line is None and not self.threats.exhausted:
+                defences.append(move)
+        return defences or None
+    
+    def _iterative_deepening(self, board, max_depth, deadline, key, stones,
+                             track_last_move, root_moves=None):
+        """
+        迭代加深：每轮以上一轮的最佳着法优先搜索，超时或被停止时丢弃未完成的一轮
+        deadline 为 perf_counter 时限，None时不限时，只在停止标志被设置时提前结束
+        """
+        self._deadline = float('inf') if deadline is None else deadline
+        root_board = board.copy()
+        best_move = best_score = None
+        completed = 0
+        scores = []
+        try:
+            for depth in range(1, max_depth + 1):
+                start, nodes = time.perf_counter(), self.nodes
+                try:
+                    # 奇数层和偶数层的分数相差很大，渴望窗口以两轮之前的分数为中心
+                    guess = scores[-2] if len(scores) > 1 else None
+                    move, score = self._search_aspiration(board, depth, key, stones,
+                                                          track_last_move, best_move,
+                                                          root_moves, guess)
+                except _SearchTimeout:
+                    # 中断时棋盘停在搜索树中间，恢复根局面并重建增量状态
+                    board[...] = root_board
+                    self._init_search_state(board)
+                    break
+                best_move, best_score, completed = move, score, depth
+                scores.append(score)
+                self._depth_times.append((depth, (time.perf_counter() - start) * 1000,
+                                          self.nodes - nodes))
+                if (time.perf_counter() >= self._deadline
+                        or self._stop is not None and self._stop.value):
+                    break
+        finally:
+            self._deadline = None
+        self._result_depth, self._result_score = completed, best_score
+        
+        # 连深度1都没有完成时，使用这一轮中途找到的最佳着法
+        if best_move is None:
+            best_move = self._root_best
+        if best_move is None:
+            best_move = self._first_move(board, stones, root_moves)
+        return best_move
+    
+    def _search_aspiration(self, board, depth, key, stones, track_last_move,
+                           first_move=None, root_moves=None, guess=None):
+        """
+        迭代加深中的一轮：以预估分数guess为中心的渴望窗口搜索根节点，
+        分数落在窗口之外时放开失败的一侧重新搜索；guess为None或不使用窗口时按完整窗口搜索
+        Returns:
+            tuple: (最佳着法, 最佳分数)
+        """
+        window = self.aspiration_window
+        if (window is None or guess is None or abs(guess) == float('inf')
+                or self.workers > 1 and self.parallel == "root"):
+            return self._search_root(board, depth, key, stones, track_last_move,
+                                     first_move, root_moves)
+        alpha, beta = guess - window, guess + window
+        while True:
+            move, score = self._search_root(board, depth, key, stones, track_last_move,
+                                            first_move, root_moves, alpha, beta)
+            if score <= alpha and alpha != float('-inf'):
+                alpha = float('-inf')
+            elif score >= beta and beta != float('inf'):
+                # 高出窗口的着法至少和已知的一样好，重新搜索时先搜它
+                beta, first_move = float('inf'), move
+            else:
+                return move, score
+    
+    def _search_root(self, board, depth, key, stones, track_last_move, first_move=None,
+                     root_moves=None, alpha=float('-inf'), beta=float('inf')):
+        """
+        根节点搜索，root_moves 不为None时只搜索其中的着法
+        分数不大于alpha时只是上界，不小于beta时只是下界（此时搜到该着法即停止）
+        Returns:
+            tuple: (最佳着法, 最佳分数)
+        """
+        # 查询置换表，同一局面已有足够深度的精确结果时直接返回
+        root_key, sym = self._tt_key(key, True)
+        tt_move = None
+        if self.tt is not None:
+            self.tt_probes += 1
+            entry = self.tt.probe(root_key)
+            if entry is not None:
+                self.tt_hits += 1
+                entry_depth, entry_score, flag, tt_move = entry
+                tt_move = self._tt_move(tt_move, sym)
+                if (entry_depth >= depth and flag == EXACT and tt_move is not None
+                        and (root_moves is None or tt_move in root_moves)):
+                    return tt_move, entry_score
+        if first_move is not None:
+            tt_move = first_move
+        if root_moves is not None:
+            moves = list(root_moves)
+        else:
+            moves = self._candidate_moves(board, stones)
+        moves = self._order_moves(moves, 2, 0, tt_move)
+        self.move_generations += 1
+        
+        if self.workers > 1 and self.parallel == "root" and len(moves) > 1:
+            best_move, best_score = self._search_root_parallel(board, moves, depth, key,
+                                                               stones, track_last_move)
+        else:
+            best_move, best_score = self._search_root_serial(board, moves, depth, key,
+                                                             stones, track_last_move,
+                                                             alpha, beta)
+        
+        if self.tt is not None and best_move is not None:
+            if best_score <= alpha:
+                flag = UPPER
+            elif best_score >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.tt.store(root_key, depth, best_score, flag,
+                          self._tt_move(best_move, sym, True))
+        
+        return best_move, best_score
+    
+    def _search_root_serial(self, board, moves, depth, key, stones, track_last_move,
+                            alpha=float('-inf'), beta=float('inf')):
+        """按顺序搜索全部根着法"""
+        # 使用Minimax算法搜索最佳移动；以当前最好分数作为alpha，
+        # 不可能更好的着法会被提前剪枝，而只有严格更高的分数才会替换最佳着法
         best_score = float('-inf')
         best_move = None
+        self._root_best = None
+        keys = self._zobrist[2]
         
-        for move in self._get_possible_moves_numpy(board):
+        for i, move in enumerate(moves):
             row, col = move
-            board[row-1, col-1] = 2  # AI落子
-            score = self._minimax_numpy(board, depth - 1, False, float('-inf'), float('inf'))
-            board[row-1, col-1] = 0  # 撤销落子
+            r, c = row - 1, col - 1
+            self._make_move(board, r, c, 2)  # AI落子
+            child_key = key ^ keys[r * self.cols + c]
+            last_move = (r, c) if track_last_move else None
+            bound = max(alpha, best_score)
+            if i and self.pvs:
+                # 零窗口只判断能否超过当前最好分数，超过时再用完整窗口求精确值
+                score = self._minimax_numpy(board, depth - 1, False, bound,
+                                            float(np.nextafter(bound, float('inf'))),
+                                            child_key, last_move, stones + 1)
+                if bound < score < beta:
+                    score = self._minimax_numpy(board, depth - 1, False, bound, beta,
+                                                child_key, last_move, stones + 1)
+            else:
+                score = self._minimax_numpy(board, depth - 1, False, bound, beta,
+                                            child_key, last_move, stones + 1)
+            self._unmake_move(board, r, c)  # 撤销落子
             
             if score > best_score:
                 best_score = score
                 best_move = move
+                self._root_best = move
+            if best_score >= beta:
+                break
         
-        return best_move
+        return best_move, best_score
+    
+    def _search_root_parallel(self, board, moves, depth, key, stones, track_last_move):
+        """把根着法分发到进程池并行搜索（见RootSearchPool）"""
+        if self._pool is None:
+            self._pool = RootSearchPool(self.workers, self._pool_options)
+        # 进程池的停止标志跟随本次计算的停止标志（stop() 先设置后者，再设置前者）
+        self._pool._stop.value = 0
+        if self._stop is not None and self._stop.value:
+            self._pool._stop.value = 1
+        self._root_best = None
+        best_move, best_score = self._pool.search(np.asarray(board), moves, depth,
+                                                  key, stones, track_last_move,
+                                                  self._deadline)
+        self._root_best = best_move
+        if best_score is None:
+            raise _SearchTimeout
+        return best_move, best_score
+    
+    def _init_search_state(self, board):
+        """根据根局面初始化增量评估和候选着法状态"""
+        if self.incremental_eval:
+            self._init_eval_state(board)
+        self._init_move_state(board)
+        if self.canonical_tt:
+            self._sym_keys = symmetric_keys(board)
+    
+    def _tt_key(self, key, is_maximizing):
+        """
+        置换表的键（轮到AI走时异或行棋方键）
+        Returns:
+            tuple: (键, 对称变换序号)；不做规范化时序号为0
+        """
+        sym = 0
+        if self._sym_keys is not None:
+            key, sym = canonical(self._sym_keys)
+        return (key ^ self._side_key if is_maximizing else key), sym
+    
+    def _tt_move(self, move, sym, store=False):
+        """在当前局面与置换表中的规范局面之间变换着法，store为True时变换到规范局面"""
+        if not sym or move is None:
+            return move
+        if store:
+            return to_canonical(move, sym, self.rows, self.cols)
+        return from_canonical(move, sym, self.rows, self.cols)
+    
+    def _hash_board(self, board):
+        """计算棋盘的Zobrist哈希（不含行棋方）"""
+        key = 0
+        rows, cols = np.nonzero(board)
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            key ^= self._zobrist[board[r, c]][r * self.cols + c]
+        return key
     
-    def _is_opening(self, board):
-        """判断是否是开局"""
+    @staticmethod
+    def _move_to_front(moves, move):
+        """将指定着法（如置换表中的最佳着法）移到列表最前面"""
+        if move is not None and move in moves:
+            moves.remove(move)
+            moves.insert(0, move)
+    
+    def _is_opening(self, board, stones=None):
+        """判断是否是开局，stones 为已知的棋子数"""
         # 使用NumPy的sum提高性能
-        move_count = np.sum(board != 0)
+        move_count = np.count_nonzero(board) if stones is None else stones
         return move_count <= 2
     
     def _opening_move(self, board):
@@ -138,6 +1085,9 @@ class WuziqiAPI:
     
     def _find_winning_move_numpy(self, board, player):
         """寻找获胜移动或防守移动（NumPy优化版）"""
+        if isinstance(board, BitBoard):
+            return board.winning_move(player)
+        
         for i in range(self.rows):
             for j in range(self.cols):
                 if board[i, j] == 0:  # 空位置
@@ -149,52 +1099,359 @@ class WuziqiAPI:
                     board[i, j] = 0
         return None
     
-    def _minimax_numpy(self, board, depth, is_maximizing, alpha, beta):
-        """Minimax算法与Alpha-Beta剪枝（NumPy优化版）"""
-        if depth == 0 or self._is_game_over_numpy(board):
-            return self._evaluate_board_numpy(board)
-        
+    def _minimax_numpy(self, board, depth, is_maximizing, alpha, beta, key=None,
+                       last_move=None, stones=None):
+        """
+        Minimax算法与Alpha-Beta剪枝（NumPy优化版）
+        分数和窗口都以AI的角度表示，实际搜索以负极大值形式进行（见 _negamax）
+        key 为当前棋盘的Zobrist哈希，随落子/撤销增量更新；为None时重新计算
+        last_move 为上一手的0索引坐标，stones 为棋盘上的棋子数，
+        两者用于常数时间判断终局；last_move为None时扫描整个棋盘
+        调用前需已通过 _find_best_move 初始化增量状态
+        """
         if is_maximizing:
-            max_eval = float('-inf')
-            for move in self._get_possible_moves_numpy(board):
-                row, col = move
-                # 转换为0索引
-                r, c = row - 1, col - 1
-                board[r, c] = 2  # AI为2
-                eval_score = self._minimax_numpy(board, depth - 1, False, alpha, beta)
-                board[r, c] = 0  # 撤销
-                max_eval = max(max_eval, eval_score)
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in self._get_possible_moves_numpy(board):
-                row, col = move
-                # 转换为0索引
-                r, c = row - 1, col - 1
-                board[r, c] = 1  # 用户为1
-                eval_score = self._minimax_numpy(board, depth - 1, True, alpha, beta)
-                board[r, c] = 0  # 撤销
-                min_eval = min(min_eval, eval_score)
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break
-            return min_eval
+            return self._negamax(board, depth, 2, alpha, beta, key, last_move, stones)
+        return -self._negamax(board, depth, 1, -beta, -alpha, key, last_move, stones)
     
-    def _get_possible_moves_numpy(self, board):
-        """获取可能的移动位置（NumPy优化版）"""
+    def _negamax(self, board, depth, player, alpha, beta, key=None, last_move=None,
+                 stones=None):
+        """
+        负极大值搜索：分数以行棋方player的角度表示，双方共用同一段代码
+        开启 pvs 时第一个子节点用完整窗口搜索，其余子节点先用零窗口判断
+        能否超过alpha，只有超过时才用完整窗口重新搜索；LMR和无望剪枝见 __init__
+        置换表中的分数和边界同样以该局面行棋方的角度保存
+        """
+        self.nodes += 1
+        if depth == 0 or self._is_game_over_numpy(board, last_move, stones):
+            score = self._leaf_score(board)
+            return score if player == 2 else -score
+        
+        if self._deadline is not None and (
+                time.perf_counter() >= self._deadline
+                or self._stop is not None and self._stop.value):
+            raise _SearchTimeout()
+        
+        if key is None:
+            key = self._hash_board(board)
+        tt_key, sym = self._tt_key(key, player == 2)
+        alpha_orig, beta_orig = alpha, beta
+        
+        # 查询置换表：深度足够时直接使用或收紧窗口
+        tt_move = None
+        if self.tt is not None:
+            self.tt_probes += 1
+            entry = self.tt.probe(tt_key)
+            if entry is not None:
+                self.tt_hits += 1
+                entry_depth, entry_score, flag, tt_move = entry
+                tt_move = self._tt_move(tt_move, sym)
+                if entry_depth >= depth:
+                    if flag == EXACT:
+                        return entry_score
+                    if flag == LOWER:
+                        alpha = max(alpha, entry_score)
+                    else:
+                        beta = min(beta, entry_score)
+                    if beta <= alpha:
+                        return entry_score
+        
+        if stones is None:
+            stones = int(np.count_nonzero(board))
+        moves = self._candidate_moves(board, stones)
+        self.move_generations += 1
+        
+        # 前沿节点：所有子节点都是叶子，批量评估后得到精确值
+        if depth == 1 and self.batch_frontier:
+            best_score, best_move = self._batch_frontier(board, moves, player)
+            if self.tt is not None:
+                self.tt.store(tt_key, depth, best_score, EXACT,
+                              self._tt_move(best_move, sym, True))
+            return best_score
+        
+        ply = stones - self._root_stones
+        moves = self._order_moves(moves, player, ply, tt_move)
+        # 排在最前面的置换表、威胁和杀手着法不做选择性搜索
+        tactical = max(self._tactical_moves, 1)
+        
+        # 无望剪枝：静态评估加上余量仍不超过alpha时，平静着法不可能把分数提高到alpha以上
+        futility = None
+        if self.futility_margin is not None and depth <= self.futility_depth:
+            static = self._leaf_score(board)
+            futility = ((static if player == 2 else -static)
+                        + self.futility_margin * depth)
+            if futility > alpha:
+                futility = None
+        reduce_from = None
+        if self.lmr_moves is not None and depth >= self.lmr_depth:
+            reduce_from = max(self.lmr_moves, tactical)
+        
+        keys = self._zobrist[player]
+        opponent = 3 - player
+        best_score = float('-inf')
+        best_move = None
+        for i, move in enumerate(moves):
+            if futility is not None and i >= tactical:
+                self.pruned += len(moves) - i
+                best_score = max(best_score, futility)
+                break
+            row, col = move
+            # 转换为0索引
+            r, c = row - 1, col - 1
+            self._make_move(board, r, c, player)
+            child_key = key ^ keys[r * self.cols + c]
+            child_move = (r, c) if last_move is not None else None
+            reduced = reduce_from is not None and i >= reduce_from
+            if reduced:
+                # 后期着法先减少深度、用零窗口判断，超过alpha时再按完整深度搜索
+                self.reductions += 1
+                score = -self._negamax(board, max(depth - 1 - self.lmr_reduction, 0),
+                                       opponent,
+                                       -float(np.nextafter(alpha, float('inf'))),
+                                       -alpha, child_key, child_move, stones + 1)
+            if not reduced or score > alpha:
+                if i and self.pvs:
+                    score = -self._negamax(board, depth - 1, opponent,
+                                           -float(np.nextafter(alpha, float('inf'))),
+                                           -alpha, child_key, child_move, stones + 1)
+                    if alpha < score < beta:
+                        score = -self._negamax(board, depth - 1, opponent, -beta,
+                                               -alpha, child_key, child_move,
+                                               stones + 1)
+                else:
+                    score = -self._negamax(board, depth - 1, opponent, -beta, -alpha,
+                                           child_key, child_move, stones + 1)
+            self._unmake_move(board, r, c)  # 撤销
+            if score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+            if beta <= alpha:
+                self.cutoffs += 1
+                if self.move_ordering:
+                    self._record_cutoff(move, ply, depth)
+                break
+        
+        if self.tt is not None:
+            if best_score <= alpha_orig:
+                flag = UPPER
+            elif best_score >= beta_orig:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.tt.store(tt_key, depth, best_score, flag,
+                          self._tt_move(best_move, sym, True))
+        
+        return best_score
+    
+    def _make_move(self, board, r, c, player):
+        """落子（0索引），同时增量更新评估状态和候选着法"""
+        board[r, c] = player
+        self._cells[(r + 1) * self._stride + c + 1] = player
+        p = r * self.cols + c
+        if self.incremental_eval:
+            self._update_windows(p, player)
+        if self._sym_keys is not None:
+            self._update_sym_keys(p, player)
+        
+        for radius, near in self._near.items():
+            candidates = self._candidates[radius]
+            candidates.discard(p)
+            for q in self._neighbours[radius][p]:
+                near[q] += 1
+                if near[q] == 1 and board.item(q) == 0:
+                    candidates.add(q)
+    
+    def _unmake_move(self, board, r, c):
+        """撤销落子（0索引），同时增量更新评估状态和候选着法"""
+        board[r, c] = 0
+        index = (r + 1) * self._stride + c + 1
+        player = self._cells[index]
+        self._cells[index] = 0
+        p = r * self.cols + c
+        if self.incremental_eval:
+            self._update_windows(p, -player)
+        if self._sym_keys is not None:
+            self._update_sym_keys(p, player)
+        
+        for radius, near in self._near.items():
+            candidates = self._candidates[radius]
+            for q in self._neighbours[radius][p]:
+                near[q] -= 1
+                if near[q] == 0:
+                    candidates.discard(q)
+            if near[p] > 0:
+                candidates.add(p)
+    
+    def _update_sym_keys(self, p, player):
+        """格子p落子或撤销后更新各对称变换下的哈希"""
+        sym_keys = self._sym_keys
+        for t, key in enumerate(self._sym_cell_keys[player][p]):
+            sym_keys[t] ^= key
+    
+    def _init_move_state(self, board):
+        """根据完整棋盘初始化带边框的一维棋盘、邻域计数与候选空位集合"""
+        padded = np.full((self.rows + 2, self._stride), 3, dtype=np.int8)
+        flat = np.asarray(board).ravel()
+        padded[1:-1, 1:-1] = flat.reshape(self.rows, self.cols)
+        self._cells = padded.ravel().tolist()
+        
+        occupied = np.flatnonzero(flat).tolist()
+        for radius, neighbours in self._neighbours.items():
+            near = [0] * (self.rows * self.cols)
+            for p in occupied:
+                for q in neighbours[p]:
+                    near[q] += 1
+            self._near[radius] = near
+            self._candidates[radius] = {
+                q for q, count in enumerate(near) if count and flat[q] == 0}
+    
+    def _candidate_moves(self, board, stones):
+        """
+        从增量维护的候选集合取出候选着法（1索引，按行列顺序）
+        与 _get_possible_moves_numpy 的结果一致，但不需要重新扫描棋盘
+        """
+        radius = self.move_radius
+        if self.shrink_radius_at is not None and stones >= self.shrink_radius_at:
+            radius = 1
+        candidates = self._candidates[radius]
+        if not candidates:
+            return self._get_possible_moves_numpy(board, radius)
+        move_tuples = self._move_tuples
+        return [move_tuples[p] for p in sorted(candidates)]
+    
+    def _init_eval_state(self, board):
+        """根据完整棋盘计算所有窗口的编码和双方总分，作为增量评估的起点"""
+        # 编码形状为 (rows, cols, 4)，展平后正好是窗口编号顺序
+        codes = self._window_codes(np.asarray(board))
+        scores = _PATTERN_TABLE[codes].sum(axis=(0, 1, 2))
+        self._codes = codes.ravel().tolist()
+        self._ai_total = int(scores[0])
+        self._user_total = int(scores[1])
+    
+    def _update_windows(self, p, delta):
+        """
+        格子p的值改变delta（落子为+player，撤销为-player）后，
+        更新经过它的窗口编码，并通过查表把得分差值累加到双方总分
+        """
+        codes = self._codes
+        ai_delta = user_delta = 0
+        for w, weight in self._cell_windows[p]:
+            old = codes[w]
+            new = codes[w] = old + delta * weight
+            ai_delta += _AI_PATTERN_SCORES[new] - _AI_PATTERN_SCORES[old]
+            user_delta += _USER_PATTERN_SCORES[new] - _USER_PATTERN_SCORES[old]
+        self._ai_total += ai_delta
+        self._user_total += user_delta
+    
+    def _leaf_score(self, board):
+        """叶子节点评估：增量模式下直接读取总分，结果与_evaluate_board_numpy一致"""
+        self.evaluations += 1
+        if self.incremental_eval:
+            return self._ai_total * 1.2 - self._user_total
+        return self._evaluate_board_numpy(board)
+    
+    def _batch_frontier(self, board, moves, player):
+        """
+        批量评估深度为1节点的全部子节点
+        Returns:
+            tuple: (以player角度的最佳分数, 最佳着法)，与逐个搜索子节点的结果相同
+        """
+        self.evaluations += len(moves)
+        index = np.array(moves, dtype=np.intp) - 1  # 转换为0索引
+        children = np.repeat(np.asarray(board)[np.newaxis], len(moves), axis=0)
+        children[np.arange(len(moves)), index[:, 0], index[:, 1]] = player
+        scores = self._evaluate_boards(children)
+        if player == 1:
+            scores = -scores
+        best = int(np.argmax(scores))
+        return float(scores[best]), moves[best]
+    
+    def _evaluate_boards(self, boards):
+        """评估一批形状为 (N, rows, cols) 的棋盘，返回分数数组"""
+        if self.eval_backend == "vectorized":
+            return self._evaluate_board_numpy(boards)
+        return np.array([self._evaluate_board_numpy(b) for b in boards])
+    
+    def _init_ordering_state(self, stones, depth):
+        """开始一次搜索：清空杀手着法和历史得分"""
+        self._root_stones = stones
+        self._killers = [[None, None] for _ in range(depth + 1)]
+        self._history = [0] * (self.rows * self.cols)
+    
+    def _order_moves(self, moves, player, ply, tt_move=None):
+        """
+        着法排序
+        置换表着法最先，其次是威胁着法（成五、冲四、活三及挡住对方的同类威胁），
+        然后是本层的杀手着法，其余按威胁分和历史得分排序；同分时保持原有顺序
+        """
+        if not self.move_ordering:
+            self._move_to_front(moves, tt_move)
+            self._tactical_moves = int(tt_move is not None and tt_move in moves)
+            return moves
+        
+        cells = self._cells
+        stride, cols = self._stride, self.cols
+        opponent = 3 - player
+        killers = self._killers[ply] if ply < len(self._killers) else ()
+        history = self._history
+        keyed = []
+        for move in moves:
+            row, col = move
+            q = row * stride + col  # 1索引坐标正好是带边框棋盘中的位置
+            threat = 0
+            for step in self._steps:
+                for who, scores in ((player, _ATTACK_SCORES),
+                                    (opponent, _DEFENSE_SCORES)):
+                    count = 1
+                    k = q + step
+                    while cells[k] == who:
+                        count += 1
+                        k += step
+                    open_ends = cells[k] == 0
+                    k = q - step
+                    while cells[k] == who:
+                        count += 1
+                        k -= step
+                    open_ends += cells[k] == 0
+                    threat += scores[min(count, 5)][open_ends]
+            
+            if move == tt_move:
+                rank = 3
+            elif threat >= _FORCING_THREAT:
+                rank = 2
+            elif move in killers:
+                rank = 1
+            else:
+                rank = 0
+            keyed.append(((rank, threat, history[(row - 1) * cols + col - 1]), move))
+        
+        keyed.sort(key=itemgetter(0), reverse=True)
+        # 排在最前面的非平静着法（置换表、威胁和杀手着法）的个数，供选择性搜索使用
+        self._tactical_moves = sum(1 for key, _ in keyed if key[0])
+        return [move for _, move in keyed]
+    
+    def _record_cutoff(self, move, ply, depth):
+        """发生beta截断时记录杀手着法并增加历史得分"""
+        if ply < len(self._killers):
+            killers = self._killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        row, col = move
+        self._history[(row - 1) * self.cols + col - 1] += depth * depth
+    
+    def _get_possible_moves_numpy(self, board, radius=2):
+        """获取可能的移动位置（NumPy优化版），从头扫描整个棋盘"""
+        board = np.asarray(board)
         moves = set()
         
         # 找到所有非空位置
         non_empty = np.where(board != 0)
         non_empty_positions = list(zip(non_empty[0], non_empty[1]))
         
-        # 在已有棋子周围2格范围内搜索空位
+        # 在已有棋子周围radius格范围内搜索空位
         for i, j in non_empty_positions:
-            for di in range(-2, 3):
-                for dj in range(-2, 3):
+            for di in range(-radius, radius + 1):
+                for dj in range(-radius, radius + 1):
                     ni, nj = i + di, j + dj
                     if (0 <= ni < self.rows and 0 <= nj < self.cols and 
                         board[ni, nj] == 0):
@@ -217,7 +1474,13 @@ class WuziqiAPI:
         return list(moves)
     
     def _evaluate_board_numpy(self, board):
-        """评估棋盘分数（NumPy优化版）"""
+        """评估棋盘分数（NumPy优化版），向量化实现下board可以是一批棋盘"""
+        if self.eval_backend == "vectorized":
+            # 查一次棋型表同时得到双方得分
+            scores = _PATTERN_TABLE[self._window_codes(board)].sum(axis=(-4, -3, -2))
+            score = scores[..., 0] * 1.2 - scores[..., 1]  # AI稍微加强
+            return float(score) if np.ndim(score) == 0 else score
+        
         score = 0
         
         # 评估AI的局势
@@ -230,6 +1493,9 @@ class WuziqiAPI:
     
     def _evaluate_player_numpy(self, board, player):
         """评估某个玩家的局势（NumPy优化版）"""
+        if self.eval_backend == "vectorized":
+            return self._evaluate_player_vectorized(board, player)
+        
         score = 0
         
         # 检查所有方向
@@ -241,6 +1507,29 @@ class WuziqiAPI:
         
         return score
     
+    def _window_codes(self, board):
+        """
+        一次性计算所有窗口的棋型编码
+        board 的形状为 (..., rows, cols)，返回形状为 (..., rows, cols, 4) 的数组：
+        [..., i, j, d] 为从(i, j)沿第d个方向的5个位置的编码，越界位置按3编码
+        """
+        rows, cols = self.rows, self.cols
+        # 方向的行增量只有0和1，列增量为-1、0、1，因此只需在下方、左右各补4格
+        padded = np.full(board.shape[:-2] + (rows + 4, cols + 8), _EDGE, dtype=np.int16)
+        padded[..., :rows, 4:4 + cols] = board
+        codes = np.zeros(board.shape[:-2] + (rows, cols, 4), dtype=np.int16)
+        for d, (dr, dc) in enumerate(self.directions):
+            for k, weight in enumerate(_PATTERN_WEIGHTS):
+                codes[..., d] += weight * padded[..., k * dr:k * dr + rows,
+                                                 4 + k * dc:4 + k * dc + cols]
+        return codes
+    
+    def _evaluate_player_vectorized(self, board, player):
+        """评估某个玩家的局势（向量化版），board可以是一批棋盘"""
+        column = 0 if player == 2 else 1
+        score = _PATTERN_TABLE[self._window_codes(board), column].sum(axis=(-3, -2, -1))
+        return int(score) if np.ndim(score) == 0 else score
+    
     def _evaluate_position(self, board, row, col, dr, dc, player):
         """评估特定位置和方向的得分"""
         score = 0
@@ -321,6 +1610,9 @@ class WuziqiAPI:
     
     def _check_win_numpy(self, board, row, col, player):
         """检查是否获胜（NumPy优化版）"""
+        if isinstance(board, BitBoard):
+            return board.is_five_at(row, col, player)
+        
         for dr, dc in self.directions:
             count = 1
             
@@ -343,28 +1635,130 @@ class WuziqiAPI:
         
         return False
     
-    def _is_game_over_numpy(self, board):
-        """检查游戏是否结束（NumPy优化版）"""
-        # 检查所有位置是否有五连
+    def _is_game_over_numpy(self, board, last_move=None, stones=None):
+        """
+        检查游戏是否结束（NumPy优化版）
+        Args:
+            last_move: 最后一手的0索引坐标；给出时只有这一子可能形成五连
+            stones: 棋盘上的棋子数；给出时用它判断棋盘是否已满
+        """
+        if last_move is not None:
+            r, c = last_move
+            if self._check_win_numpy(board, r, c, board[r, c]):
+                return True
+            if stones is not None:
+                return stones >= self.rows * self.cols
+            return np.count_nonzero(board) == self.rows * self.cols
+        
+        if isinstance(board, BitBoard):
+            if board.has_five(1) or board.has_five(2):
+                return True
+            if stones is None:
+                stones = board.count()
+            return stones >= self.rows * self.cols
+        
+        # 检查所有位置是否有五连（只按该位置棋子的归属检查）
         for i in range(self.rows):
             for j in range(self.cols):
                 if board[i, j] != 0:
-                    if (self._check_win_numpy(board, i, j, 1) or 
-                        self._check_win_numpy(board, i, j, 2)):
+                    if self._check_win_numpy(board, i, j, board[i, j]):
                         return True
         
         # 检查是否棋盘已满
+        if stones is not None:
+            return stones >= self.rows * self.cols
         if np.sum(board == 0) == 0:
             return True
         
         return False
 
 # 使用示例
-def init(rows=15, cols=15, search_depth=3):
-    """初始化函数"""
-    return WuziqiAPI(rows, cols, search_depth)
+def init(rows=15, cols=15, search_depth=3, **kwargs):
+    """初始化函数，其余关键字参数传给WuziqiAPI"""
+    return WuziqiAPI(rows, cols, search_depth, **kwargs)
+
+# 便捷函数共用的结果缓存；Runapi 在每个线程中复用一个引擎，
+# 引擎的置换表每次调用后清空，跨调用只通过有内存上限的结果缓存复用结果
+result_cache = ResultCache()
+_local = threading.local()
 
-def Runapi(QiPan, auto_add=True, search_depth=None):
+
+def _default_api():
+    """当前线程的默认引擎"""
+    api = getattr(_local, 'api', None)
+    if api is None:
+        api = _local.api = WuziqiAPI(result_cache=result_cache)
+    return api
+
+
+def Runapi(QiPan, auto_add=True, search_depth=None, time_limit_ms=None,
+           with_stats=False, who="api"):
     """运行API的便捷函数"""
-    api = WuziqiAPI()
-    return api.Runapi(QiPan, auto_add, search_depth)
\ No newline at end of file
+    api = _default_api()
+    try:
+        return api.Runapi(QiPan, auto_add, search_depth, time_limit_ms, with_stats, who)
+    finally:
+        if api.tt is not None:
+            api.tt.clear()
+
+
+async def arunapi(QiPan, auto_add=True, search_depth=None, time_limit_ms=None,
+                  executor=None, with_stats=False, who="api"):
+    """运行API的便捷函数（asyncio版本）"""
+    # 搜索在执行器的线程中进行，停止标志按实例保存，因此每次使用新的引擎
+    api = WuziqiAPI(result_cache=result_cache)
+    return await api.arunapi(QiPan, auto_add, search_depth, time_limit_ms, executor,
+                             with_stats, who)
+
+
+# Runapi_batch 使用的常驻进程池，按 (进程数, 引擎参数) 复用
+_batch_pools = {}
+
+
+def Runapi_batch(QiPans, auto_add=True, search_depth=None, time_limit_ms=None,
+                 workers=None, stream=False, **kwargs):
+    """
+    批量计算多盘互不相关的棋局的AI落子
+    棋盘分发到常驻的进程池，每个工作进程保留一个引擎（含置换表）供后续调用复用。
+    单盘出错不影响其他棋盘，该盘的结果为对应的异常对象。
+    Args:
+        QiPans: 棋盘的列表，每个棋盘可以是字典或 Runapi 接受的紧凑格式
+        auto_add: 是否自动将AI的落子添加到各自的棋盘
+        search_depth: 搜索深度，如果为None则使用默认值；设置时限时为深度上限
+        time_limit_ms: 每盘的思考时限（毫秒）
+        workers: 进程数，None表示CPU核数
+        stream: 为True时返回生成器，每算完一盘产出一个 (序号, 结果)
+        **kwargs: 传给工作进程内WuziqiAPI的参数
+    Returns:
+        list: 与输入顺序相同的结果，成功时与Runapi相同为落子字典，失败时为异常对象
+    """
+    options = dict(kwargs)
+    pool_key = (workers, tuple(sorted(options.items())))
+    pool = _batch_pools.get(pool_key)
+    if pool is None or pool.broken:
+        pool = _batch_pools[pool_key] = BatchPool(workers, options)
+    
+    def results():
+        for index, move in pool.run(QiPans, search_depth, time_limit_ms):
+            if isinstance(move, Exception) or move is None:
+                yield index, move if move is not None else {}
+                continue
+            row, col = move
+            if auto_add:
+                _add_move(QiPans[index], row, col, options.get("cols", 15))
+            yield index, {f"{row},{col}": "api"}
+    
+    if stream:
+        return results()
+    ordered = [None] * len(QiPans)
+    for index, result in results():
+        ordered[index] = result
+    return ordered
+
+
+@atexit.register
+def _close_batch_pools():
+    """退出时关闭 Runapi_batch 的进程池"""
+    for pool in _batch_pools.values():
+        pool.close()
+    _batch_pools.clear()
\ No newline at end of file
@@ -0,0 +1,369 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+# 工作进程内的全局状态：共享的 [最佳分数, 最佳着法序号]、共享置换表、停止标志，
+# 以及常驻的搜索引擎
+_shared = None
+_table = None
+_stop = None
+_engine = None
+_engine_options = None
+_engine_search = None
+
+
+def _init_worker(shared, stop):
+    """工作进程初始化：保存共享的alpha和停止标志"""
+    global _shared, _stop
+    _shared = shared
+    _stop = stop
+
+
+def _init_smp_worker(table, stop):
+    """Lazy SMP 工作进程初始化：连接共享置换表，保存停止标志"""
+    global _table, _stop
+    _table = table
+    _stop = stop
+
+
+def _get_engine(options, search_id=None):
+    """
+    取得本进程常驻的引擎
+    根节点并行时同一次搜索内保留置换表、新一次搜索时清空；
+    Lazy SMP 时引擎直接使用共享置换表
+    """
+    global _engine, _engine_options, _engine_search
+    if _engine is None or _engine_options != options:
+        from .core import WuziqiAPI
+        _engine = WuziqiAPI(**options)
+        _engine_options = options
+        _engine_search = None
+        if _table is not None:
+            _engine.tt = _table
+    if search_id is not None and _engine_search != search_id:
+        if _engine.tt is not None:
+            _engine.tt.clear()
+        _engine_search = search_id
+    return _engine
+
+
+def _root_alpha(index):
+    """
+    读取共享的alpha
+    序号在当前最佳着法之前的着法使用略小的alpha，使同分时也能得到精确值，
+    从而与单进程一样在同分着法中选择排序靠前的一个
+    """
+    with _shared.get_lock():
+        score, best_index = _shared[0], _shared[1]
+    if score == float('-inf') or index > best_index:
+        return score
+    return float(np.nextafter(score, float('-inf')))
+
+
+def _publish(index, score):
+    """把一个根着法的精确分数写入共享的alpha"""
+    with _shared.get_lock():
+        if score > _shared[0] or (score == _shared[0] and index < _shared[1]):
+            _shared[0] = score
+            _shared[1] = index
+
+
+def _search_move(options, search_id, board, depth, key, stones, track_last_move,
+                 index, move, deadline):
+    """
+    在工作进程中搜索一个根着法
+    deadline 为整个根节点搜索的 perf_counter 时限（系统范围的单调时钟，
+    各进程可以直接比较），None表示不限时
+    Returns:
+        tuple: (序号, 分数)；分数不大于所用alpha时该着法不可能被选中，
+               分数记为-inf；超时或被停止时分数为None
+    """
+    from .bitboard import BitBoard
+    from .core import _SearchTimeout
+
+    if deadline is not None and (_stop.value or time.perf_counter() >= deadline):
+        return index, None
+    engine = _get_engine(options, search_id)
+    if engine.board_backend == "bitboard":
+        board = BitBoard.from_array(board)
+    engine._init_search_state(board)
+    engine._init_ordering_state(stones, depth)
+    if deadline is not None:
+        engine._deadline = deadline
+        engine._stop = _stop
+
+    alpha = _root_alpha(index)
+    row, col = move
+    r, c = row - 1, col - 1
+    engine._make_move(board, r, c, 2)
+    try:
+        score = engine._minimax_numpy(board, depth - 1, False, alpha, float('inf'),
+                                      key ^ engine._zobrist[2][r * engine.cols + c],
+                                      (r, c) if track_last_move else None, stones + 1)
+    except _SearchTimeout:
+        return index, None
+    finally:
+        engine._deadline = None
+        engine._stop = None
+    if score <= alpha:
+        return index, float('-inf')
+    _publish(index, score)
+    return index, score
+
+
+class RootSearchPool:
+    """
+    根节点并行搜索
+    第一个（排序最靠前的）根着法先单独搜索，得到的分数作为alpha，
+    其余根着法再分发给进程池。每个工作进程在开始搜索时读取共享的alpha，
+    搜索出更好的着法后立即更新它。合并时取分数最高、同分时序号最小的着法，
+    因此与单进程按顺序搜索选出的着法相同。
+    可以被停止的搜索（限时或 asyncio 版本）中，工作进程还检查共享的停止标志，
+    设置后正在搜索的着法立即中止，尚未开始的着法被取消。
+    """
+
+    def __init__(self, workers, options):
+        """
+        Args:
+            workers: 工作进程数
+            options: 创建工作进程内引擎的参数（WuziqiAPI的构造参数）
+        """
+        self.workers = workers
+        self.options = options
+        self._shared = multiprocessing.Array('d', 2)
+        self._stop = multiprocessing.RawValue('b', 0)
+        self._executor = ProcessPoolExecutor(max_workers=workers,
+                                             initializer=_init_worker,
+                                             initargs=(self._shared, self._stop))
+        self._search_id = 0
+
+    def close(self):
+        """关闭进程池"""
+        self._stop.value = 1
+        self._executor.shutdown(wait=True)
+
+    def search(self, board, moves, depth, key, stones, track_last_move, deadline=None):
+        """
+        并行搜索全部根着法
+        Args:
+            board: 根局面（np.int8 数组）
+            moves: 已排序的根着法（1索引）
+            deadline: perf_counter 时限，None表示不限时（也不检查停止标志）
+        Returns:
+            tuple: (最佳着法, 最佳分数)；超时或被停止时返回 (已完成部分的最佳着法, None)
+        """
+        self._search_id += 1
+        with self._shared.get_lock():
+            self._shared[0] = float('-inf')
+            self._shared[1] = len(moves)
+        board = np.asarray(board, dtype=np.int8)
+
+        def submit(index):
+            # 传绝对时限：排队等待的着法不能在开始时重新得到完整的时间
+            return self._executor.submit(
+                _search_move, self.options, self._search_id, board, depth, key, stones,
+                track_last_move, index, moves[index], deadline)
+
+        best_index, best_score = None, float('-inf')
+        timed_out = False
+        pending = {submit(0)}
+        submitted = 1
+        while pending:
+            timeout = None
+            if deadline is not None and deadline != float('inf') and not timed_out:
+                timeout = max(deadline - time.perf_counter(), 0)
+            done, pending = wait(pending, timeout, FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                index, score = future.result()
+                if score is None:
+                    timed_out = True
+                elif score > best_score or (score == best_score
+                                            and best_index is not None
+                                            and index < best_index):
+                    best_index, best_score = index, score
+            # 第一个着法完成后再分发其余着法，让它们从一开始就有alpha可用
+            if deadline is not None and (self._stop.value
+                                         or time.perf_counter() >= deadline):
+                timed_out = True
+            if submitted == 1 and not timed_out:
+                pending |= {submit(index) for index in range(1, len(moves))}
+                submitted = len(moves)
+            if timed_out:
+                # 正在搜索的着法看到停止标志后立即返回，尚未开始的着法直接取消
+                self._stop.value = 1
+                for future in pending:
+                    future.cancel()
+
+        best_move = moves[best_index] if best_index is not None else None
+        return best_move, None if timed_out else best_score
+
+
+def _smp_search(options, board, depth, key, stones, track_last_move, root_moves,
+                worker, time_limit_ms):
+    """
+    Lazy SMP 工作进程：完整搜索同一个根局面，通过共享置换表与其他进程互相利用结果
+    辅助进程（worker > 0）把不同的根着法排在最前，奇数号辅助进程多搜一层，
+    使各进程的搜索树错开。
+    Returns:
+        tuple: (进程序号, 完成的深度, 最佳着法, 最佳分数)，一层都没有完成时深度为0
+    """
+    from .bitboard import BitBoard
+    from .core import _SearchTimeout
+
+    engine = _get_engine(options)
+    if engine.board_backend == "bitboard":
+        board = BitBoard.from_array(board)
+    root_board = board.copy()
+    engine._init_search_state(board)
+    depths = [depth + worker % 2] if time_limit_ms is None else range(1, depth + 1)
+    engine._init_ordering_state(stones, depths[-1])
+
+    moves = root_moves
+    if moves is None:
+        moves = engine._candidate_moves(board, stones)
+    moves = engine._order_moves(list(moves), 2, 0)
+    first_move = moves[worker % len(moves)] if worker and moves else None
+    if time_limit_ms is None:
+        engine._deadline = float('inf')  # 只用于检查停止标志
+    else:
+        engine._deadline = time.perf_counter() + time_limit_ms / 1000
+    engine._stop = _stop
+
+    completed, best_move, best_score = 0, None, None
+    scores = []
+    try:
+        for d in depths:
+            try:
+                # 渴望窗口以同奇偶的上上一轮分数为中心（见 WuziqiAPI._iterative_deepening）
+                guess = scores[-2] if len(scores) > 1 else None
+                move, score = engine._search_aspiration(board, d, key, stones,
+                                                        track_last_move, first_move,
+                                                        root_moves, guess)
+            except _SearchTimeout:
+                board[...] = root_board
+                break
+            completed, best_move, best_score = d, move, score
+            scores.append(score)
+            # 辅助进程的第一着只用来错开第一层，之后沿用上一层的最佳着法
+            first_move = move
+    finally:
+        engine._deadline = None
+        engine._stop = None
+    return worker, completed, best_move, best_score
+
+
+class LazySMPPool:
+    """
+    Lazy SMP 多进程搜索
+    所有工作进程搜索同一个根局面，共用一张放在共享内存中的置换表
+    （SharedTranspositionTable）。各进程的着法顺序和深度略有不同，
+    一个进程存入的结果可以直接截断其他进程的搜索，同样的时间内能搜得更深。
+    固定深度时返回0号进程的结果，其余进程随即停止；
+    限时搜索时返回完成深度最大的结果，同深度取序号最小的进程。
+    """
+
+    def __init__(self, workers, options, table):
+        """
+        Args:
+            workers: 工作进程数
+            options: 创建工作进程内引擎的参数（WuziqiAPI的构造参数）
+            table: 共享置换表
+        """
+        self.workers = workers
+        self.options = options
+        self.table = table
+        self._stop = multiprocessing.RawValue('b', 0)
+        self._executor = ProcessPoolExecutor(max_workers=workers,
+                                             initializer=_init_smp_worker,
+                                             initargs=(table, self._stop))
+
+    def close(self):
+        """关闭进程池"""
+        self._stop.value = 1
+        self._executor.shutdown(wait=True)
+
+    def search(self, board, depth, key, stones, track_last_move, root_moves=None,
+               time_limit_ms=None):
+        """
+        多进程搜索根局面
+        Args:
+            board: 根局面（np.int8 数组）
+            depth: 搜索深度；限时搜索时为深度上限
+            root_moves: 只搜索这些根着法，None表示全部候选着法
+            time_limit_ms: 思考时限（毫秒），None表示按固定深度搜索；
+                           float('inf') 表示不限时地迭代加深，直到停止标志被设置
+        Returns:
+            tuple: (最佳着法, 完成的深度)
+        """
+        self._stop.value = 0
+        board = np.asarray(board, dtype=np.int8)
+        futures = [self._executor.submit(_smp_search, self.options, board, depth, key,
+                                         stones, track_last_move, root_moves, worker,
+                                         time_limit_ms)
+                   for worker in range(self.workers)]
+        if time_limit_ms is None:
+            _, completed, best_move, _ = futures[0].result()
+            self._stop.value = 1
+            wait(futures)
+            return best_move, completed
+
+        results = [future.result() for future in futures]
+        _, completed, best_move, _ = max(results,
+                                         key=lambda result: (result[1], -result[0]))
+        return best_move, completed
+
+
+def _batch_move(options, index, QiPan, search_depth, time_limit_ms):
+    """
+    在工作进程中计算一盘棋的最佳着法
+    Returns:
+        tuple: (序号, 1索引着法或None)；出错时第二项为异常对象
+    """
+    try:
+        return index, _get_engine(options)._think(QiPan, search_depth, time_limit_ms)
+    except Exception as error:
+        return index, error
+
+
+class BatchPool:
+    """
+    批量计算多盘棋的常驻进程池
+    每个工作进程保留一个引擎，多次调用之间复用；每盘棋单独提交，
+    一盘出错（包括工作进程异常退出）只影响这一盘的结果。
+    """
+
+    def __init__(self, workers=None, options=None):
+        """
+        Args:
+            workers: 工作进程数，None表示CPU核数
+            options: 创建工作进程内引擎的参数（WuziqiAPI的构造参数）
+        """
+        self.options = dict(options or {})
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self.broken = False  # 有工作进程异常退出后进程池不能再用
+
+    def close(self):
+        """关闭进程池"""
+        self._executor.shutdown(wait=True)
+
+    def run(self, QiPans, search_depth=None, time_limit_ms=None):
+        """
+        提交全部棋盘，按完成顺序产出结果
+        Yields:
+            tuple: (序号, 1索引着法、None或异常对象)
+        """
+        futures = {self._executor.submit(_batch_move, self.options, index, QiPan,
+                                         search_depth, time_limit_ms): index
+                   for index, QiPan in enumerate(QiPans)}
+        for future in as_completed(futures):
+            error = future.exception()
+            if error is not None:
+                self.broken |= isinstance(error, BrokenProcessPool)
+                yield futures[future], error
+            else:
+                yield future.result()
@@ -0,0 +1,182 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .bitboard import BitBoard
+from .core import _PLAYERS, WuziqiAPI, _swap_players
+
+
+@lru_cache(maxsize=None)
+def _five_windows(rows, cols):
+    """
+    预计算完全在棋盘内的五格窗口
+    格子使用引擎带边框的一维下标 (r + 1) * (cols + 2) + c + 1（0索引的r、c）
+    Returns:
+        tuple: (窗口列表，每个窗口为5个格子的元组；
+                下标为 r * cols + c、元素为经过该格的窗口编号元组的列表)
+    """
+    stride = cols + 2
+    windows = []
+    cell_windows = [[] for _ in range(rows * cols)]
+    for r in range(rows):
+        for c in range(cols):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_r, end_c = r + 4 * dr, c + 4 * dc
+                if not (end_r < rows and 0 <= end_c < cols):
+                    continue
+                cells = [(r + k * dr, c + k * dc) for k in range(5)]
+                for i, j in cells:
+                    cell_windows[i * cols + j].append(len(windows))
+                windows.append(tuple((i + 1) * stride + j + 1 for i, j in cells))
+    return tuple(windows), tuple(tuple(w) for w in cell_windows)
+
+
+class GameSession:
+    """
+    一整盘棋的对局会话
+    在多次落子之间保留棋盘、Zobrist哈希、候选着法和窗口编码等增量状态，
+    每步只按变化更新，不必像 Runapi 那样每次重新解析整个棋盘字典并重建状态；
+    引擎的置换表也在整盘棋中持续使用。
+    会话独占自己的引擎，不要再用 session.api 直接调用 Runapi。
+    """
+
+    def __init__(self, rows=15, cols=15, search_depth=3, **kwargs):
+        """
+        Args:
+            rows: 行数
+            cols: 列数
+            search_depth: 搜索深度，默认为3
+            **kwargs: 其余参数传给 WuziqiAPI
+        """
+        self.api = WuziqiAPI(rows, cols, search_depth, **kwargs)
+        self.rows = rows
+        self.cols = cols
+        self.board = np.zeros((rows, cols), dtype=np.int8)
+        if self.api.board_backend == "bitboard":
+            self.board = BitBoard.from_array(self.board)
+        self.key = 0
+        self.moves = []  # 已走的着法 (行, 列, 落子方)，1索引
+        self.winner = None  # 形成五连的一方（"users" 或 "api"）
+        self.api._init_search_state(self.board)
+        # 双方的成五点：窗口中有4个同色棋子和1个空位时，该空位即为成五点。
+        # 每步只重新检查经过落子位置的窗口，{带边框下标: 给出该点的窗口数}
+        self._windows, self._cell_windows = _five_windows(rows, cols)
+        self._window_fives = [None] * len(self._windows)
+        self._fives = {1: {}, 2: {}}
+
+    def close(self):
+        """关闭引擎的进程池（见 WuziqiAPI.close）"""
+        self.api.close()
+
+    def play(self, row, col, who):
+        """
+        落子
+        Args:
+            row: 行（1索引）
+            col: 列（1索引）
+            who: 落子方，"users" 或 "api"
+        """
+        if who not in _PLAYERS:
+            raise ValueError(f"未知的落子方: {who}")
+        if not (1 <= row <= self.rows and 1 <= col <= self.cols):
+            raise ValueError(f"落子位置超出棋盘: {row},{col}")
+        r, c = row - 1, col - 1
+        if self.board[r, c]:
+            raise ValueError(f"该位置已有棋子: {row},{col}")
+        if self.winner is not None:
+            raise ValueError("对局已经结束")
+
+        player = _PLAYERS[who]
+        self.api._make_move(self.board, r, c, player)
+        self.key ^= self.api._zobrist[player][r * self.cols + c]
+        self.moves.append((row, col, who))
+        self._update_fives(r * self.cols + c)
+        if self.api._check_win_numpy(self.board, r, c, player):
+            self.winner = who
+
+    def undo(self):
+        """
+        悔棋：撤销最后一步
+        Returns:
+            tuple: 被撤销的着法 (行, 列, 落子方)
+        """
+        if not self.moves:
+            raise ValueError("没有可以撤销的着法")
+        row, col, who = self.moves.pop()
+        r, c = row - 1, col - 1
+        self.api._unmake_move(self.board, r, c)
+        self.key ^= self.api._zobrist[_PLAYERS[who]][r * self.cols + c]
+        self._update_fives(r * self.cols + c)
+        self.winner = None
+        return row, col, who
+
+    def _update_fives(self, p):
+        """格子p落子或撤销后，重新检查经过它的窗口给出的成五点"""
+        cells = self.api._cells
+        for w in self._cell_windows[p]:
+            old = self._window_fives[w]
+            if old is not None:
+                fives = self._fives[old[0]]
+                fives[old[1]] -= 1
+                if not fives[old[1]]:
+                    del fives[old[1]]
+            new = None
+            window = self._windows[w]
+            values = [cells[q] for q in window]
+            if values.count(0) == 1:
+                empty = window[values.index(0)]
+                for player in (1, 2):
+                    if values.count(player) == 4:
+                        new = (player, empty)
+                        fives = self._fives[player]
+                        fives[empty] = fives.get(empty, 0) + 1
+            self._window_fives[w] = new
+
+    def _five_move(self, player):
+        """该玩家按行列顺序的第一个成五点（1索引），没有时返回None"""
+        fives = self._fives[player]
+        if not fives:
+            return None
+        return divmod(min(fives), self.cols + 2)
+
+    def best_move(self, search_depth=None, time_limit_ms=None, auto_play=False,
+                  who="api"):
+        """
+        计算落子方在当前局面的最佳着法
+        Args:
+            search_depth: 搜索深度，如果为None则使用默认值
+            time_limit_ms: 思考时限（毫秒），如果为None则使用默认值
+            auto_play: 是否直接以落子方的身份走这一步
+            who: 为哪一方计算，默认 "api"；为 "users" 时替用户一方下棋
+        Returns:
+            tuple: 1索引的 (行, 列)；对局已经结束或棋盘已满时返回None
+        """
+        if who not in _PLAYERS:
+            raise ValueError(f"未知的落子方: {who}")
+        stones = len(self.moves)
+        if self.winner is not None or stones >= self.rows * self.cols:
+            return None
+        api = self.api
+        depth = search_depth if search_depth is not None else api.search_depth
+        if time_limit_ms is None:
+            time_limit_ms = api.time_limit_ms
+
+        if who == "api":
+            fives = {player: self._five_move(player) for player in (1, 2)}
+            move = api._find_best_move(self.board, depth, time_limit_ms, self.key,
+                                       stones, fives)
+        else:
+            # 引擎总是以棋盘值2的一方思考：在交换了双方棋子的棋盘上搜索，
+            # 之后按会话的棋盘恢复增量状态
+            move = api._find_best_move(_swap_players(self.board), depth, time_limit_ms)
+            api._init_search_state(self.board)
+        if move and auto_play:
+            self.play(move[0], move[1], who)
+        return move
+
+    def to_qipan(self):
+        """转换为 Runapi 使用的棋盘字典"""
+        QiPan = self.api.init_board()
+        for row, col, who in self.moves:
+            QiPan[f"{row},{col}"] = who
+        return QiPan
@@ -0,0 +1,73 @@
+class SearchStats:
+    """
+    一次落子计算的统计信息
+    计数只包括本进程内的搜索，多进程搜索时工作进程中的节点不计入。
+    Attributes:
+        move: 选出的着法（1索引），没有可走的位置时为None
+        stage: 决定着法的阶段："cache"（结果缓存）、"opening"（开局规则）、"book"（开局库）、
+               "win"（直接成五）、"defend"（挡住对方成五）、"threat"（威胁空间搜索）、
+               "search"（极大极小搜索）
+        depth: 完成的搜索深度，不经搜索决定时为None
+        score: 最佳着法的分数，不经搜索决定时为None
+        time_ms: 总耗时（毫秒）
+        nodes: 搜索节点数
+        evaluations: 叶子评估次数
+        cutoffs: alpha-beta 截断次数
+        tt_probes: 置换表查询次数
+        tt_hits: 置换表命中次数
+        move_generations: 生成候选着法的次数（即展开的节点数）
+        depth_times: 每一轮完成的搜索 [(深度, 耗时毫秒, 节点数)]
+        threat_nodes: 威胁空间搜索的节点数
+        reductions: 后期着法减少深度（LMR）搜索的次数
+        pruned: 无望剪枝跳过的着法数
+    """
+
+    def __init__(self, move=None, stage="search", depth=None, score=None, time_ms=0.0,
+                 nodes=0, evaluations=0, cutoffs=0, tt_probes=0, tt_hits=0,
+                 move_generations=0, depth_times=None, threat_nodes=0, reductions=0,
+                 pruned=0):
+        self.move = move
+        self.stage = stage
+        self.depth = depth
+        self.score = score
+        self.time_ms = time_ms
+        self.nodes = nodes
+        self.evaluations = evaluations
+        self.cutoffs = cutoffs
+        self.tt_probes = tt_probes
+        self.tt_hits = tt_hits
+        self.move_generations = move_generations
+        self.depth_times = depth_times or []
+        self.threat_nodes = threat_nodes
+        self.reductions = reductions
+        self.pruned = pruned
+
+    @property
+    def nps(self):
+        """每秒搜索节点数"""
+        return self.nodes / self.time_ms * 1000 if self.time_ms else 0.0
+
+    @property
+    def branching_factor(self):
+        """平均分支因子：每个展开的节点实际搜索的子节点数"""
+        return self.nodes / self.move_generations if self.move_generations else 0.0
+
+    @property
+    def tt_hit_rate(self):
+        """置换表命中率"""
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    def as_dict(self):
+        """转换为字典（含计算得到的指标），便于写日志或上报监控"""
+        result = dict(self.__dict__)
+        result['depth_times'] = [list(entry) for entry in self.depth_times]
+        result['nps'] = round(self.nps)
+        result['branching_factor'] = round(self.branching_factor, 2)
+        result['tt_hit_rate'] = round(self.tt_hit_rate, 4)
+        return result
+
+    def __repr__(self):
+        return (f"SearchStats(move={self.move}, stage={self.stage!r}, "
+                f"depth={self.depth}, "
+                f"time_ms={self.time_ms:.1f}, nodes={self.nodes}, nps={self.nps:.0f}, "
+                f"branching_factor={self.branching_factor:.2f})")
@@ -0,0 +1,106 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .transposition import zobrist_keys
+
+
+@lru_cache(maxsize=None)
+def cell_maps(rows, cols):
+    """
+    棋盘的对称变换
+    方形棋盘有8种（二面体群：旋转0/90/180/270度及4种翻转），
+    rows != cols 时只有4种（不变、上下翻转、左右翻转、旋转180度）。
+    Returns:
+        tuple: maps[t][p] 为一维下标 p = r * cols + c 的格子在第t种变换下的位置，
+               第0种为恒等变换
+    """
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (rows - 1 - r, c),
+        lambda r, c: (r, cols - 1 - c),
+        lambda r, c: (rows - 1 - r, cols - 1 - c),
+    ]
+    if rows == cols:
+        transforms += [
+            lambda r, c: (c, r),
+            lambda r, c: (c, rows - 1 - r),
+            lambda r, c: (cols - 1 - c, r),
+            lambda r, c: (cols - 1 - c, rows - 1 - r),
+        ]
+    maps = []
+    for transform in transforms:
+        cells = []
+        for r in range(rows):
+            for c in range(cols):
+                ni, nj = transform(r, c)
+                cells.append(ni * cols + nj)
+        maps.append(tuple(cells))
+    return tuple(maps)
+
+
+@lru_cache(maxsize=None)
+def inverse_maps(rows, cols):
+    """各变换的逆变换：inverse[t][maps[t][p]] == p"""
+    inverse = []
+    for cells in cell_maps(rows, cols):
+        back = [0] * len(cells)
+        for p, q in enumerate(cells):
+            back[q] = p
+        inverse.append(tuple(back))
+    return tuple(inverse)
+
+
+@lru_cache(maxsize=None)
+def symmetric_cell_keys(rows, cols):
+    """
+    每个格子在各变换下对应的Zobrist键
+    Returns:
+        tuple: keys[player][p][t] 为 p 经第t种变换后的格子的Zobrist键，
+               落子/撤销时逐个异或即可增量维护所有变换下的哈希
+    """
+    keys, _ = zobrist_keys(rows, cols)
+    maps = cell_maps(rows, cols)
+    return tuple(
+        tuple(tuple(keys[player][cells[p]] for cells in maps)
+              for p in range(rows * cols))
+        for player in range(3))
+
+
+def symmetric_keys(board):
+    """棋盘（NumPy数组或位棋盘）在各变换下的Zobrist哈希"""
+    rows, cols = board.shape
+    cell_keys = symmetric_cell_keys(rows, cols)
+    hashes = [0] * len(cell_maps(rows, cols))
+    flat = np.asarray(board).ravel()
+    for p in np.flatnonzero(flat).tolist():
+        for t, key in enumerate(cell_keys[flat[p]][p]):
+            hashes[t] ^= key
+    return hashes
+
+
+def canonical(hashes):
+    """
+    从各变换下的哈希中选出规范形式：取最小的哈希，相同时取序号最小的变换
+    Returns:
+        tuple: (规范哈希, 变换序号t)，规范局面为原局面经第t种变换的结果
+    """
+    key = min(hashes)
+    return key, hashes.index(key)
+
+
+def canonical_key(board):
+    """棋盘的规范哈希及对应的变换序号，见 canonical"""
+    return canonical(symmetric_keys(board))
+
+
+def to_canonical(move, t, rows, cols):
+    """把1索引着法从原局面变换到规范局面"""
+    q = cell_maps(rows, cols)[t][(move[0] - 1) * cols + move[1] - 1]
+    return q // cols + 1, q % cols + 1
+
+
+def from_canonical(move, t, rows, cols):
+    """把规范局面中的1索引着法变换回原局面"""
+    q = inverse_maps(rows, cols)[t][(move[0] - 1) * cols + move[1] - 1]
+    return q // cols + 1, q % cols + 1
@@ -0,0 +1,339 @@
+import time
+
+import numpy as np
+
+from .transposition import zobrist_keys
+
+
+class _BudgetExceeded(Exception):
+    """威胁搜索用完节点数或时间预算时在搜索内部抛出"""
+
+
+class ThreatSolver:
+    """
+    威胁空间搜索（VCF/VCT）
+    进攻方只走冲四（VCF），或冲四和活三（VCT）；防守方只考虑被迫的应对：
+    挡住冲四的唯一一点，或者在活三所在的线上阻挡、以及用自己的冲四反击。
+    防守方的应对是完整的，因此找到的取胜路线在所有应对下都成立；
+    进攻方的着法有所取舍，找不到并不代表没有。
+    棋盘使用带一圈边框（值为3）的一维列表，(r, c) 的下标为 r * stride + c（1索引）。
+    """
+
+    def __init__(self, rows=15, cols=15):
+        self.rows = rows
+        self.cols = cols
+        self.stride = cols + 2
+        self.steps = (self.stride, 1, self.stride + 1, self.stride - 1)
+
+        # 按带边框下标索引的Zobrist键，用于记录已证明失败的局面
+        keys, _ = zobrist_keys(rows, cols)
+        size = (rows + 2) * self.stride
+        self._keys = [[0] * size for _ in range(3)]
+        for player in (1, 2):
+            for r in range(rows):
+                for c in range(cols):
+                    q = (r + 1) * self.stride + c + 1
+                    self._keys[player][q] = keys[player][r * cols + c]
+
+        self.cells = None
+        self.stones = None
+        self.key = 0
+        self.nodes = 0
+        self.exhausted = False
+        self._failed = {}
+        self._threats = {}
+        self._max_nodes = 0
+        self._deadline = None
+
+    def load(self, board):
+        """从 (rows, cols) 的棋盘（NumPy数组或位棋盘）载入局面"""
+        padded = np.full((self.rows + 2, self.stride), 3, dtype=np.int8)
+        padded[1:-1, 1:-1] = np.asarray(board)
+        flat = padded.ravel()
+        self.cells = flat.tolist()
+        self.stones = [[], [], []]
+        self.key = 0
+        # 只遍历棋子，不逐格检查整个棋盘
+        for q in np.flatnonzero((flat == 1) | (flat == 2)).tolist():
+            player = self.cells[q]
+            self.stones[player].append(q)
+            self.key ^= self._keys[player][q]
+
+    def solve(self, board, player, max_depth=8, vct=True, max_nodes=20000,
+              time_limit_ms=None):
+        """
+        寻找该玩家先走时的连续取胜路线
+        先搜索VCF，再搜索VCT，进攻步数依次从1加深到max_depth，优先返回最短的路线
+        Args:
+            board: 当前棋盘
+            player: 进攻方（1为用户，2为AI）
+            max_depth: 进攻方最多走几步
+            vct: 是否允许活三作为进攻着法
+            max_nodes: 节点数上限
+            time_limit_ms: 时间上限（毫秒），None表示不限
+        Returns:
+            list: 双方交替的着法（1索引），第一步为进攻方的着法；没有找到时返回None。
+                  预算用完而中止时 exhausted 为True
+        """
+        self.load(board)
+        self.nodes = 0
+        self.exhausted = False
+        self._max_nodes = max_nodes
+        self._deadline = None
+        if time_limit_ms is not None:
+            self._deadline = time.perf_counter() + time_limit_ms / 1000
+
+        wins = self._all_five_cells(player)
+        if wins:
+            return [self._move(min(wins))]
+        defender_fives = self._all_five_cells(3 - player)
+
+        try:
+            for use_vct in ((False, True) if vct else (False,)):
+                # 失败记录和着法分类只在同一种搜索内有效
+                self._failed = {}
+                self._threats = {}
+                for depth in range(1, max_depth + 1):
+                    line = self._attack(player, defender_fives, depth, use_vct)
+                    if line is not None:
+                        return line
+        except _BudgetExceeded:
+            self.exhausted = True
+        return None
+
+    def _move(self, q):
+        """带边框下标转换为1索引着法"""
+        return divmod(q, self.stride)
+
+    def _place(self, q, player):
+        self.cells[q] = player
+        self.stones[player].append(q)
+        self.key ^= self._keys[player][q]
+
+    def _remove(self, q, player):
+        self.cells[q] = 0
+        self.stones[player].pop()
+        self.key ^= self._keys[player][q]
+
+    def _count(self, q, step, player):
+        """沿step方向经过q的连续同色棋子数（q本身按该玩家计）"""
+        cells = self.cells
+        count = 1
+        k = q + step
+        while cells[k] == player:
+            count += 1
+            k += step
+        k = q - step
+        while cells[k] == player:
+            count += 1
+            k -= step
+        return count
+
+    def _line_five_cells(self, q, step, player):
+        """沿step方向、与q相连的成五点"""
+        cells = self.cells
+        result = set()
+        for direction in (step, -step):
+            k = q + direction
+            for _ in range(4):
+                value = cells[k]
+                if value == 0:
+                    if self._count(k, step, player) >= 5:
+                        result.add(k)
+                elif value != player:
+                    break
+                k += direction
+        return result
+
+    def _five_cells(self, q, player, steps=None):
+        """经过q的各条线（默认四条）上该玩家的成五点"""
+        result = set()
+        for step in steps or self.steps:
+            result |= self._line_five_cells(q, step, player)
+        return result
+
+    def _all_five_cells(self, player):
+        """整盘该玩家的成五点"""
+        result = set()
+        for q in self.stones[player]:
+            result |= self._five_cells(q, player)
+        return result
+
+    def _line_counts(self, player):
+        """
+        统计空位沿四条线两侧各4格内、未被对方棋子或边界隔断的该玩家棋子数
+        冲四点所在的线上至少已有3个己方棋子，活三点至少2个
+        Returns:
+            dict: 空位 -> 四个方向的棋子数
+        """
+        cells = self.cells
+        counts = {}
+        for q in self.stones[player]:
+            for d, step in enumerate(self.steps):
+                for direction in (step, -step):
+                    k = q + direction
+                    for _ in range(4):
+                        value = cells[k]
+                        if value == 0:
+                            row = counts.get(k)
+                            if row is None:
+                                row = counts[k] = [0, 0, 0, 0]
+                            row[d] += 1
+                        elif value != player:
+                            break
+                        k += direction
+        return counts
+
+    def _three_steps(self, q, player, steps):
+        """在给定方向中找出刚落在q的棋子形成活三的方向：沿该方向再走一步即可成活四"""
+        cells = self.cells
+        result = []
+        for step in steps:
+            found = False
+            for direction in (step, -step):
+                k = q + direction
+                for _ in range(4):
+                    value = cells[k]
+                    if value == 0:
+                        cells[k] = player
+                        found = len(self._line_five_cells(k, step, player)) >= 2
+                        cells[k] = 0
+                        if found:
+                            break
+                    elif value != player:
+                        break
+                    k += direction
+                if found:
+                    result.append(step)
+                    break
+        return result
+
+    def _three_defences(self, q, player, steps):
+        """活三所在各条线上距q不超过5的空位"""
+        cells = self.cells
+        opponent = 3 - player
+        result = set()
+        for step in steps:
+            for direction in (step, -step):
+                k = q + direction
+                for _ in range(5):
+                    value = cells[k]
+                    if value == 3 or value == opponent:
+                        break
+                    if value == 0:
+                        result.add(k)
+                    k += direction
+        return result
+
+    def _four_moves(self, player):
+        """该玩家落子即成冲四（或活四）的空位"""
+        result = set()
+        for q, row in self._line_counts(player).items():
+            steps = [step for step, n in zip(self.steps, row) if n >= 3]
+            if not steps:
+                continue
+            self.cells[q] = player
+            if self._five_cells(q, player, steps):
+                result.add(q)
+            self.cells[q] = 0
+        return result
+
+    def _classify(self, player, defender_fives, vct):
+        """
+        对进攻着法分类，防守方有成五点时只能走在该点
+        Returns:
+            tuple: (直接获胜的着法或None, [(冲四点, 成五点)], [(活三点, 活三方向)])
+        """
+        counts = self._line_counts(player)
+        if defender_fives:
+            candidates = [q for q in defender_fives if q in counts]
+        else:
+            candidates = sorted(counts)
+        fours = []
+        threes = []
+        for q in candidates:
+            row = counts[q]
+            four_steps = [step for step, n in zip(self.steps, row) if n >= 3]
+            three_steps = []
+            if vct:
+                three_steps = [step for step, n in zip(self.steps, row) if n >= 2]
+            if not four_steps and not three_steps:
+                continue
+            self.cells[q] = player
+            wins = self._five_cells(q, player, four_steps) if four_steps else ()
+            if len(wins) >= 2:
+                self.cells[q] = 0
+                return q, fours, threes
+            if wins:
+                fours.append((q, wins.pop()))
+            elif three_steps:
+                steps = self._three_steps(q, player, three_steps)
+                if steps:
+                    threes.append((q, steps))
+            self.cells[q] = 0
+        return None, fours, threes
+
+    def _attack(self, player, defender_fives, depth, vct):
+        """
+        进攻方走棋
+        defender_fives 为防守方当前的成五点：有一个时进攻方必须先挡住它，多于一个时失败
+        """
+        self.nodes += 1
+        if self.nodes > self._max_nodes or (
+                self._deadline is not None and self.nodes & 63 == 0
+                and time.perf_counter() > self._deadline):
+            raise _BudgetExceeded
+        if len(defender_fives) > 1:
+            return None
+        failed = self._failed.get(self.key)
+        if failed is not None and failed >= depth:
+            return None
+
+        opponent = 3 - player
+        # 先对所有着法分类：双成五点（活四、双冲四）直接获胜，其次冲四，最后活三；
+        # 迭代加深会多次到达同一局面，分类结果按局面缓存
+        classified = self._threats.get(self.key)
+        if classified is None:
+            classified = self._classify(player, defender_fives, vct)
+            self._threats[self.key] = classified
+        win, fours, threes = classified
+        if win is not None:
+            return [self._move(win)]
+
+        if depth > 1:
+            # 冲四：防守方只能挡在唯一的成五点
+            for q, w in fours:
+                self._place(q, player)
+                self._place(w, opponent)
+                line = self._attack(player, self._five_cells(w, opponent), depth - 1,
+                                    vct)
+                self._remove(w, opponent)
+                self._remove(q, player)
+                if line is not None:
+                    return [self._move(q), self._move(w)] + line
+
+            # 活三：防守方的每种应对都必须仍能取胜
+            for q, steps in threes:
+                self._place(q, player)
+                line = self._defend(q, player, steps, depth, vct)
+                self._remove(q, player)
+                if line is not None:
+                    return line
+
+        self._failed[self.key] = depth
+        return None
+
+    def _defend(self, q, player, steps, depth, vct):
+        """防守方应对落在q的活三，返回沿第一种应对的取胜路线，任何一种应对化解时返回None"""
+        opponent = 3 - player
+        replies = self._three_defences(q, player, steps) | self._four_moves(opponent)
+        line = []
+        for d in sorted(replies):
+            self._place(d, opponent)
+            result = self._attack(player, self._five_cells(d, opponent), depth - 1, vct)
+            self._remove(d, opponent)
+            if result is None:
+                return None
+            if not line:
+                line = [self._move(d)] + result
+        return [self._move(q)] + line
@@ -0,0 +1,231 @@
+import random
+import struct
+import weakref
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python 3.8 之前没有共享内存
+    shared_memory = None
+
+# 置换表条目的边界类型
+EXACT = 0  # 精确值
+LOWER = 1  # 下界（发生beta截断）
+UPPER = 2  # 上界（所有走法都未超过alpha）
+
+ZOBRIST_SEED = 20240601
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(rows, cols, seed=ZOBRIST_SEED):
+    """
+    生成Zobrist随机键
+    使用固定种子，保证不同进程、不同实例得到相同的哈希值
+    Returns:
+        tuple: (keys, side_key)，keys[player][r * cols + c] 为64位随机数，
+               player 为0的一行全为0，方便直接按棋盘值索引
+    """
+    rng = random.Random(seed)
+    n = rows * cols
+    keys = (
+        (0,) * n,
+        tuple(rng.getrandbits(64) for _ in range(n)),
+        tuple(rng.getrandbits(64) for _ in range(n)),
+    )
+    side_key = rng.getrandbits(64)
+    return keys, side_key
+
+
+class TranspositionTable:
+    """
+    置换表
+    以Zobrist哈希为键，保存搜索深度、分数、边界类型和最佳着法。
+    表项按 key & mask 映射到固定数量的槽位，槽位冲突时采用
+    “深度优先 + 老化”替换策略：新结果深度不小于旧结果、或旧结果来自
+    之前的搜索时才会覆盖。
+    """
+
+    def __init__(self, max_entries=1 << 18):
+        """
+        Args:
+            max_entries: 最大条目数，向上取整为2的幂
+        """
+        size = 1
+        while size < max_entries:
+            size <<= 1
+        self.size = size
+        self.mask = size - 1
+        self.generation = 0
+        self._slots = {}
+
+    def __len__(self):
+        return len(self._slots)
+
+    def new_search(self):
+        """开始新一轮搜索，旧条目随之老化"""
+        self.generation += 1
+
+    def clear(self):
+        """清空置换表"""
+        self._slots.clear()
+        self.generation = 0
+
+    def probe(self, key):
+        """
+        查询置换表
+        Returns:
+            tuple: (depth, score, flag, move)，未命中时返回None
+        """
+        entry = self._slots.get(key & self.mask)
+        if entry is not None and entry[0] == key:
+            return entry[1:5]
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        """写入置换表"""
+        index = key & self.mask
+        old = self._slots.get(index)
+        if (old is None or old[0] == key or old[5] != self.generation
+                or depth >= old[1]):
+            self._slots[index] = (key, depth, score, flag, move, self.generation)
+
+
+def _unlink_shared_memory(shm):
+    """释放共享内存块；映射随最后一个引用它的数组一起关闭"""
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+# 共享置换表的条目：check = key ^ data ^ score的位模式，读取时用它校验条目是否完整
+SHARED_ENTRY_DTYPE = np.dtype([('check', '<u8'), ('score', '<f8'), ('data', '<u8')])
+_HEADER_BYTES = 8  # 共享内存开头保存当前的搜索代数
+_OCCUPIED = 1 << 34  # data 中标记槽位已被使用的位
+
+
+def _float_bits(value):
+    """float64 的位模式"""
+    return struct.unpack('<Q', struct.pack('<d', value))[0]
+
+
+class SharedTranspositionTable:
+    """
+    多进程共享的置换表
+    条目保存在 multiprocessing.shared_memory 中的NumPy记录数组里，接口与
+    TranspositionTable 相同。读写不加锁：data 中打包了深度、边界类型、着法和代数，
+    写入时保存 key ^ data ^ score，读取时用同样的异或还原key，
+    其他进程写到一半的条目校验不通过，按未命中处理。
+    """
+
+    def __init__(self, max_entries=1 << 18, name=None):
+        """
+        Args:
+            max_entries: 最大条目数，向上取整为2的幂
+            name: 已有共享内存块的名字；为None时新建一块（由创建者负责 unlink）
+        """
+        if shared_memory is None:
+            raise RuntimeError("共享置换表需要 Python 3.8 及以上版本")
+        size = 1
+        while size < max_entries:
+            size <<= 1
+        self.size = size
+        self.mask = size - 1
+        nbytes = _HEADER_BYTES + size * SHARED_ENTRY_DTYPE.itemsize
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self.shm.buf[:nbytes] = bytes(nbytes)
+            # 没有调用 close() 就被回收时也释放共享内存，不留到进程退出
+            self._finalizer = weakref.finalize(self, _unlink_shared_memory, self.shm)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+        self._header = np.ndarray((1,), dtype='<u8', buffer=self.shm.buf)
+        self.entries = np.ndarray((size,), dtype=SHARED_ENTRY_DTYPE,
+                                  buffer=self.shm.buf, offset=_HEADER_BYTES)
+        self._check = self.entries['check']
+        self._score = self.entries['score']
+        self._data = self.entries['data']
+
+    def __len__(self):
+        return int(np.count_nonzero(self._data))
+
+    def __getstate__(self):
+        # 传给其他进程时只传名字，在对方进程中重新连接同一块共享内存
+        return {'max_entries': self.size, 'name': self.name}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_entries'], state['name'])
+
+    @property
+    def generation(self):
+        return int(self._header[0])
+
+    def new_search(self):
+        """开始新一轮搜索，旧条目随之老化"""
+        self._header[0] = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        """清空置换表"""
+        self.entries.fill(0)
+        self._header[0] = 0
+
+    def close(self):
+        """断开与共享内存的连接；创建者同时释放共享内存"""
+        self._header = self.entries = None
+        self._check = self._score = self._data = None
+        self.shm.close()
+        if self.owner:
+            self._finalizer()
+
+    @staticmethod
+    def _pack(depth, flag, move, generation):
+        """
+        data 的位布局：深度 0-7，边界类型 8-9，着法行 10-17、列 18-25，代数 26-33，
+        第34位恒为1，使深度为0的条目也不等于表示空槽位的0
+        """
+        data = _OCCUPIED | depth | flag << 8 | generation << 26
+        if move is not None:
+            data |= move[0] << 10 | move[1] << 18
+        return data
+
+    def _read(self, index, key):
+        """读取并校验一个槽位，key不符或条目不完整时返回None"""
+        data = self._data.item(index)
+        score = self._score.item(index)
+        if data == 0 or self._check.item(index) ^ data ^ _float_bits(score) != key:
+            return None
+        return data, score
+
+    def probe(self, key):
+        """
+        查询置换表
+        Returns:
+            tuple: (depth, score, flag, move)，未命中时返回None
+        """
+        entry = self._read(key & self.mask, key)
+        if entry is None:
+            return None
+        data, score = entry
+        row, col = data >> 10 & 0xFF, data >> 18 & 0xFF
+        move = (row, col) if row else None
+        return data & 0xFF, score, data >> 8 & 0x3, move
+
+    def store(self, key, depth, score, flag, move):
+        """写入置换表"""
+        index = key & self.mask
+        generation = self.generation
+        old_data = self._data.item(index)
+        if old_data and self._read(index, key) is None:
+            # 槽位被其他局面占用：只在新结果更深或旧条目已老化时覆盖
+            if old_data >> 26 & 0xFF == generation and depth < old_data & 0xFF:
+                return
+        data = self._pack(depth, flag, move, generation)
+        score = float(score)
+        self._data[index] = data
+        self._score[index] = score
+        self._check[index] = key ^ data ^ _float_bits(score)
@@ -0,0 +1,216 @@
+"""
+引擎对局测试
+两组引擎参数在多个进程中无界面地对下若干盘。每盘从随机摆放的几手开局开始，
+同一个开局双方各执一次先手；胜负按真正的五连判断。
+报告每秒对局数、A相对于B的Elo差（含95%置信区间）和双方每步耗时的分位数，
+用来确认提速没有以棋力为代价。
+
+用法:
+    python benchmarks/arena.py --games 40 --a '{"pvs": false}' --b '{}'
+    python benchmarks/arena.py --games 100 --depth 3 --workers 8 -o arena.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from Wziqi_api import GameSession
+
+# 先手为 "users"（棋盘值1），与 Runapi 中用户先行的约定相同
+COLOURS = ("users", "api")
+
+
+def random_openings(count, size, stones, seed):
+    """
+    生成随机开局：在中心5x5范围内双方交替摆放stones手（同一开局中的位置互不重复）
+    Returns:
+        list: 开局的列表，每个开局为1索引着法 (行, 列) 的列表
+    """
+    rng = random.Random(seed)
+    center = size // 2 + 1
+    cells = [(center + dr, center + dc) for dr in range(-2, 3) for dc in range(-2, 3)]
+    return [rng.sample(cells, stones) for _ in range(count)]
+
+
+def play_game(config_a, config_b, opening, a_first, size, depth, time_limit_ms,
+              max_moves):
+    """
+    对下一盘
+    两个引擎各自维护一个 GameSession，每一手同时走在两个会话上
+    Returns:
+        dict: winner 为 "a"、"b" 或None（和棋），moves 为总手数，
+              latency 为双方每步的耗时（毫秒）
+    """
+    sessions = {}
+    for name, config in (("a", config_a), ("b", config_b)):
+        options = dict(config)
+        options.setdefault("search_depth", depth)
+        sessions[name] = GameSession(size, size, **options)
+    engines = {COLOURS[0]: "a" if a_first else "b", COLOURS[1]: "b" if a_first else "a"}
+    latency = {"a": [], "b": []}
+    winner = None
+    try:
+        for n, (row, col) in enumerate(opening):
+            for session in sessions.values():
+                session.play(row, col, COLOURS[n % 2])
+
+        moves = len(opening)
+        while moves < max_moves:
+            who = COLOURS[moves % 2]
+            name = engines[who]
+            start = time.perf_counter()
+            move = sessions[name].best_move(time_limit_ms=time_limit_ms, who=who)
+            latency[name].append((time.perf_counter() - start) * 1000)
+            if move is None:
+                break
+            for session in sessions.values():
+                session.play(move[0], move[1], who)
+            moves += 1
+            if sessions[name].winner is not None:
+                winner = name
+                break
+    finally:
+        for session in sessions.values():
+            session.close()
+    return {"winner": winner, "moves": moves, "a_first": a_first, "latency": latency}
+
+
+def elo_difference(wins, losses, draws):
+    """
+    由A的胜、负、和局数估计A相对于B的Elo差
+    Returns:
+        tuple: (Elo差, 95%置信区间下限, 上限)，全胜或全负时为正负无穷
+    """
+    games = wins + losses + draws
+    score = (wins + 0.5 * draws) / games
+    # 每盘得分（1、0、0.5）的方差
+    variance = (wins * (1 - score) ** 2 + losses * score ** 2
+                + draws * (0.5 - score) ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    return _elo(score), _elo(score - margin), _elo(score + margin)
+
+
+def _elo(score):
+    """期望得分对应的Elo差"""
+    if score <= 0:
+        return float('-inf')
+    if score >= 1:
+        return float('inf')
+    return -400 * math.log10(1 / score - 1)
+
+
+def latency_percentiles(values):
+    """每步耗时（毫秒）的分位数"""
+    if not values:
+        return {}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"moves": len(values), "mean": round(float(np.mean(values)), 2),
+            "p50": round(float(p50), 2), "p90": round(float(p90), 2),
+            "p99": round(float(p99), 2), "max": round(max(values), 2)}
+
+
+def run_match(config_a, config_b, games=20, size=15, depth=2, time_limit_ms=None,
+              workers=None, seed=0, opening_stones=3, max_moves=None, progress=None):
+    """
+    在进程池中对下games盘
+    Args:
+        progress: 每下完一盘调用的函数，参数为 (已完成盘数, 该盘结果)
+    Returns:
+        dict: 对局结果汇总
+    """
+    max_moves = max_moves or size * size
+    openings = random_openings((games + 1) // 2, size, opening_stones, seed)
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [executor.submit(play_game, config_a, config_b, openings[i // 2],
+                                   i % 2 == 0, size, depth, time_limit_ms, max_moves)
+                   for i in range(games)]
+        for future in as_completed(futures):
+            results.append(future.result())
+            if progress is not None:
+                progress(len(results), results[-1])
+    wall = time.perf_counter() - start
+
+    wins = sum(r["winner"] == "a" for r in results)
+    losses = sum(r["winner"] == "b" for r in results)
+    draws = games - wins - losses
+    elo, low, high = elo_difference(wins, losses, draws)
+    return {
+        "games": games,
+        "a_wins": wins,
+        "b_wins": losses,
+        "draws": draws,
+        "first_player_wins": sum(r["winner"] is not None
+                                 and (r["winner"] == "a") == r["a_first"]
+                                 for r in results),
+        "elo": elo,
+        "elo_low": low,
+        "elo_high": high,
+        "wall_s": round(wall, 3),
+        "games_per_s": round(games / wall, 4),
+        "avg_moves": round(sum(r["moves"] for r in results) / games, 1),
+        "latency_ms": {name: latency_percentiles([t for r in results
+                                                  for t in r["latency"][name]])
+                       for name in ("a", "b")},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="五子棋引擎对局测试")
+    parser.add_argument("--a", default="{}", help="引擎A的 WuziqiAPI 参数（JSON）")
+    parser.add_argument("--b", default="{}", help="引擎B的 WuziqiAPI 参数（JSON）")
+    parser.add_argument("--games", type=int, default=20, help="对局数")
+    parser.add_argument("--size", type=int, default=15, help="棋盘大小")
+    parser.add_argument("--depth", type=int, default=2, help="搜索深度（参数中未指定时）")
+    parser.add_argument("--time-limit-ms", type=int, help="每步思考时限（毫秒）")
+    parser.add_argument("--workers", type=int, help="进程数，默认为CPU核数")
+    parser.add_argument("--seed", type=int, default=0, help="随机开局的种子")
+    parser.add_argument("--opening-stones", type=int, default=3, help="随机开局的手数")
+    parser.add_argument("--max-moves", type=int, help="超过该手数判为和棋，默认为格子数")
+    parser.add_argument("-o", "--output", help="结果JSON文件")
+    args = parser.parse_args(argv)
+    config_a, config_b = json.loads(args.a), json.loads(args.b)
+
+    def progress(done, result):
+        winner = {"a": "A胜", "b": "B胜", None: "和棋"}[result["winner"]]
+        first = "A" if result["a_first"] else "B"
+        print(f"第{done}/{args.games}盘: {winner}，{result['moves']}手（{first}先手）")
+
+    summary = run_match(config_a, config_b, args.games, args.size, args.depth,
+                        args.time_limit_ms, args.workers, args.seed,
+                        args.opening_stones, args.max_moves, progress)
+
+    print(f"\nA: {config_a}\nB: {config_b}")
+    print(f"A胜 {summary['a_wins']}，B胜 {summary['b_wins']}，和棋 {summary['draws']}，"
+          f"先手胜 {summary['first_player_wins']}，平均 {summary['avg_moves']} 手")
+    print(f"Elo差（A-B）: {summary['elo']:+.0f} "
+          f"[{summary['elo_low']:+.0f}, {summary['elo_high']:+.0f}]")
+    print(f"{summary['games']}盘用时 {summary['wall_s']:.1f}秒，"
+          f"{summary['games_per_s']:.3f}盘/秒")
+    for name in ("a", "b"):
+        lat = summary["latency_ms"][name]
+        if lat:
+            print(f"{name.upper()} 每步耗时(毫秒): 平均 {lat['mean']}  p50 {lat['p50']}  "
+                  f"p90 {lat['p90']}  p99 {lat['p99']}  最大 {lat['max']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"a": config_a, "b": config_b, "depth": args.depth,
+                       "time_limit_ms": args.time_limit_ms, "seed": args.seed,
+                       "summary": summary}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+搜索引擎基准测试
+固定的局面集合（开局、中局、战术、边角，15路和19路棋盘）在多个深度下搜索，
+记录耗时、搜索节点数、每秒节点数、叶子评估次数、截断次数、置换表命中率、
+分支因子和峰值内存，结果写入JSON。
+给出基准结果时逐项比较，耗时或节点数超过阈值的退化会被标出，并以状态1退出。
+
+用法:
+    python benchmarks/benchmark.py -o base.json
+    python benchmarks/benchmark.py -o new.json --compare base.json --threshold 0.1
+    python benchmarks/benchmark.py --depths 2 3 4 \
+        --config '{"board_backend": "bitboard"}'
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from Wziqi_api import WuziqiAPI
+
+# 局面为着法列表（1索引），用户先手、双方交替，最后轮到AI走
+CORPUS = [
+    # 开局
+    {"name": "opening-3", "category": "opening", "size": 15,
+     "moves": [(8, 8), (8, 9), (9, 9)]},
+    {"name": "opening-5", "category": "opening", "size": 15,
+     "moves": [(8, 8), (7, 9), (9, 9), (9, 7), (7, 7)]},
+    {"name": "opening-19", "category": "opening", "size": 19,
+     "moves": [(10, 10), (10, 11), (11, 11), (9, 9), (11, 10)]},
+    # 中局
+    {"name": "middle-13", "category": "middlegame", "size": 15,
+     "moves": [(7, 6), (8, 8), (8, 7), (9, 8), (10, 8), (6, 7), (5, 6), (7, 5), (4, 7),
+               (7, 8), (6, 8), (8, 9), (9, 10)]},
+    {"name": "middle-21", "category": "middlegame", "size": 15,
+     "moves": [(7, 6), (6, 7), (8, 8), (7, 8), (8, 9), (8, 10), (8, 6), (8, 7),
+               (9, 6), (6, 9), (5, 10), (6, 6), (10, 6), (11, 6), (6, 8), (7, 7),
+               (5, 7), (9, 7), (10, 7), (7, 9), (9, 9)]},
+    {"name": "middle-19", "category": "middlegame", "size": 19,
+     "moves": [(8, 8), (8, 7), (10, 10), (9, 9), (8, 10), (9, 10), (9, 11), (10, 8),
+               (7, 9), (6, 8), (10, 12), (11, 13), (11, 9), (8, 12), (12, 8), (13, 7),
+               (5, 9)]},
+    # 战术：用户有连续冲四、活三取胜的威胁，AI必须找到化解的着法
+    {"name": "tactic-a", "category": "tactical", "size": 15,
+     "moves": [(6, 6), (6, 5), (8, 8), (7, 7), (6, 4), (8, 6), (9, 5), (7, 3), (9, 6),
+               (9, 7), (9, 4)]},
+    {"name": "tactic-b", "category": "tactical", "size": 15,
+     "moves": [(8, 7), (8, 8), (9, 7), (8, 6), (8, 9), (10, 8), (9, 8), (11, 8), (7, 5),
+               (7, 10), (10, 7), (7, 7), (12, 8), (6, 11), (6, 5)]},
+    {"name": "tactic-c", "category": "tactical", "size": 15,
+     "moves": [(6, 8), (8, 8), (8, 9), (7, 8), (7, 10), (9, 7), (8, 7), (9, 8),
+               (10, 8), (5, 8), (9, 6), (10, 6), (7, 9), (10, 9), (10, 10), (10, 7),
+               (11, 5), (9, 9), (9, 10)]},
+    # 边角
+    {"name": "edge-side", "category": "edge", "size": 15,
+     "moves": [(1, 5), (2, 4), (1, 3), (1, 4), (1, 6), (3, 4), (1, 2), (3, 3), (2, 1)]},
+    {"name": "edge-19", "category": "edge", "size": 19,
+     "moves": [(1, 16), (1, 17), (2, 18), (3, 18), (3, 17), (1, 15), (4, 19), (4, 17),
+               (1, 14), (3, 19), (1, 19)]},
+    {"name": "edge-corner", "category": "edge", "size": 15,
+     "moves": [(1, 1), (2, 2), (1, 2), (3, 3), (2, 1)]},
+]
+
+DEFAULT_DEPTHS = (2, 3)
+
+
+def build_board(case):
+    """把着法列表转换为棋盘数组"""
+    size = case["size"]
+    board = np.zeros((size, size), dtype=np.int8)
+    for n, (row, col) in enumerate(case["moves"]):
+        board[row - 1, col - 1] = 1 if n % 2 == 0 else 2
+    return board
+
+
+def run_case(case, depth, repeat, config):
+    """
+    测试一个局面在一个深度下的表现
+    每次都使用新的引擎（置换表为空），耗时取多次中的最小值；
+    峰值内存另外在 tracemalloc 下单独运行一次测得
+    """
+    size = case["size"]
+    board = build_board(case)
+    times = []
+    for _ in range(repeat):
+        api = WuziqiAPI(size, size, depth, **config)
+        start = time.perf_counter()
+        move = api._think(board.copy())
+        times.append(time.perf_counter() - start)
+        api.close()
+    stats = api.stats
+    nodes = stats.nodes
+
+    api = WuziqiAPI(size, size, depth, **config)
+    tracemalloc.start()
+    api._think(board.copy())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    api.close()
+
+    wall = min(times)
+    return {
+        "name": case["name"],
+        "category": case["category"],
+        "size": size,
+        "depth": depth,
+        "move": list(move) if move else None,
+        "time_s": round(wall, 6),
+        "nodes": nodes,
+        "nps": round(nodes / wall) if wall > 0 else 0,
+        "evaluations": stats.evaluations,
+        "cutoffs": stats.cutoffs,
+        "tt_hit_rate": round(stats.tt_hit_rate, 4),
+        "branching_factor": round(stats.branching_factor, 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def environment():
+    """运行环境信息，写入结果文件便于对照"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__)).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results, baseline, threshold, min_delta=0.01):
+    """
+    与基准结果比较
+    节点数是确定的，按比例阈值判断；耗时还要求增加超过 min_delta 秒，
+    避免很短的项目因计时抖动被误判
+    Returns:
+        tuple: (退化的项目, 着法与基准不同的项目)，退化的项目为
+               (局面名, 深度, 指标, 基准值, 当前值)，着法不同的项目为 (局面名, 深度)
+    """
+    base = {(r["name"], r["depth"]): r for r in baseline["results"]}
+    regressions = []
+    changed = []
+    for r in results:
+        b = base.get((r["name"], r["depth"]))
+        if b is None:
+            continue
+        for metric in ("time_s", "nodes"):
+            if metric == "time_s" and r[metric] - b[metric] <= min_delta:
+                continue
+            if b[metric] and r[metric] > b[metric] * (1 + threshold):
+                regressions.append((r["name"], r["depth"], metric, b[metric],
+                                    r[metric]))
+        if r["move"] != b["move"]:
+            changed.append((r["name"], r["depth"]))
+    return regressions, changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="五子棋搜索引擎基准测试")
+    parser.add_argument("-o", "--output", help="结果JSON文件")
+    parser.add_argument("--depths", type=int, nargs="+", default=DEFAULT_DEPTHS,
+                        help="搜索深度")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，耗时取最小值")
+    parser.add_argument("--filter", default="", help="只运行名字中含有该字符串的局面")
+    parser.add_argument("--config", default="{}", help="WuziqiAPI 的其余参数（JSON）")
+    parser.add_argument("--compare", help="作为基准的结果JSON文件")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="耗时或节点数超过基准的比例阈值")
+    parser.add_argument("--min-delta", type=float, default=0.01,
+                        help="耗时增加不超过该秒数时不算退化")
+    args = parser.parse_args(argv)
+    config = json.loads(args.config)
+
+    print(f"{'局面':<20} {'深度':>4} {'耗时(秒)':>10} {'节点数':>10} {'节点/秒':>10} "
+          f"{'评估次数':>10} {'峰值内存(KB)':>12}  着法")
+    results = []
+    for case in CORPUS:
+        if args.filter not in case["name"]:
+            continue
+        for depth in args.depths:
+            r = run_case(case, depth, args.repeat, config)
+            results.append(r)
+            print(f"{r['name']:<20} {depth:>4} {r['time_s']:>10.3f} {r['nodes']:>10} "
+                  f"{r['nps']:>10} {r['evaluations']:>10} {r['peak_kb']:>12}  "
+                  f"{r['move']}")
+
+    total_time = sum(r["time_s"] for r in results)
+    total_nodes = sum(r["nodes"] for r in results)
+    summary = {
+        "time_s": round(total_time, 6),
+        "nodes": total_nodes,
+        "nps": round(total_nodes / total_time) if total_time > 0 else 0,
+    }
+    print(f"\n合计: {summary['time_s']:.3f}秒, {summary['nodes']}个节点, "
+          f"{summary['nps']}节点/秒")
+
+    output = {"environment": environment(), "config": config,
+              "depths": list(args.depths), "results": results, "summary": summary}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions, changed = compare(results, baseline, args.threshold,
+                                       args.min_delta)
+        if changed:
+            print("\n着法与基准不同: "
+                  + ", ".join(f"{name} 深度{depth}" for name, depth in changed))
+        if regressions:
+            print(f"\n超过阈值 {args.threshold:.0%} 的退化:")
+            for name, depth, metric, old, new in regressions:
+                print(f"  {name} 深度{depth} {metric}: {old} -> {new} "
+                      f"({new / old - 1:+.1%})")
+            return 1
+        print("\n没有超过阈值的退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,7 +8,7 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import time
 import threading
-from wuziqi_api import init, Runapi
+from Wziqi_api import init, Runapi
 
 class WuziqiTester:
     """五子棋AI测试器"""
@@ -174,7 +174,7 @@ class WuziqiTester:
             max_steps = self.max_steps.get()
             
             self.log_message(f"开始AI自我对抗测试 (最大步数: {max_steps})...")
-            self.log_message("○: AI1 (先手)  ×: AI2 (后手)")
+            self.log_message("○: AI1 (先手，users)  ×: AI2 (后手，api)")
             self.log_message("-" * 50)
             
             try:
@@ -183,8 +183,10 @@ class WuziqiTester:
                 board = api.init_board()
                 
                 current_player = "AI1"  # AI1 先手
+                sides = {"AI1": "users", "AI2": "api"}  # 双方各自的棋子
                 steps = 0
                 game_over = False
+                winner = None
                 
                 start_time = time.time()
                 
@@ -196,23 +198,23 @@ class WuziqiTester:
                     self.log_message(f"第 {steps} 步 - {current_player} 思考中...")
                     self.log_message(f"当前棋盘棋子数: {len(occupied_positions)}")
                     
-                    # AI 落子
+                    # AI 以当前一方的身份落子
                     move_start = time.time()
-                    ai_move = Runapi(board, auto_add=True)
+                    ai_move = Runapi(board, auto_add=True, who=sides[current_player])
                     move_time = time.time() - move_start
                     
                     if ai_move:
                         move_pos = list(ai_move.keys())[0]
                         self.log_message(f"{current_player} 落子: {move_pos} (思考: {move_time:.2f}s)")
                         
-                        # 切换玩家
-                        current_player = "AI2" if current_player == "AI1" else "AI1"
-                        
-                        # 简单检查游戏是否结束（这里可以扩展真正的获胜检查）
-                        if steps >= 5 and self.check_simple_win_condition(board, move_pos):
+                        # 检查这一手是否形成五连
+                        if self.check_win(api, board, move_pos):
                             game_over = True
-                            winner = "AI2" if current_player == "AI1" else "AI1"
+                            winner = current_player
                             self.log_message(f"游戏结束! 获胜方: {winner}")
+                        
+                        # 切换玩家
+                        current_player = "AI2" if current_player == "AI1" else "AI1"
                     else:
                         self.log_message(f"{current_player} 无法落子，游戏结束")
                         game_over = True
@@ -226,7 +228,7 @@ class WuziqiTester:
                     "total_steps": steps,
                     "total_time": total_time,
                     "avg_time_per_move": total_time / steps if steps > 0 else 0,
-                    "winner": "平局" if not game_over else winner,
+                    "winner": winner or "平局",
                     "max_steps_reached": steps >= max_steps
                 }
                 
@@ -246,19 +248,14 @@ class WuziqiTester:
         
         threading.Thread(target=run_self_play).start()
     
-    def check_simple_win_condition(self, board, last_move):
+    def check_win(self, api, board, last_move):
         """
-        简单的获胜条件检查（示例用）
-        在实际应用中，你应该使用core.py中的完整获胜检查
+        用core.py中的五连检查判断最后一手是否获胜
+        （多盘无界面的对局测试见 benchmarks/arena.py）
         """
-        # 这里只是一个简单的示例
-        # 在实际使用中，你应该调用core.py中的获胜检查函数
-        try:
-            # 模拟获胜检查 - 在实际中应该调用你的获胜检查逻辑
-            occupied_count = sum(1 for v in board.values() if v != "None")
-            return occupied_count >= 10  # 简单示例：当棋子达到一定数量时结束
-        except:
-            return False
+        row, col = map(int, last_move.split(','))
+        player = 1 if board[last_move] == "users" else 2
+        return api._check_win_numpy(api._parse_board(board), row - 1, col - 1, player)
     
     def show_statistics(self):
         """显示统计信息"""
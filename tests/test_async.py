@@ -0,0 +1,107 @@
+"""
+arunapi 的测试
+stop()、任务取消和思考时限都能让正在进行的搜索及时结束，
+单进程、根节点并行和 Lazy SMP 的引擎都是如此。
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from benchmark import CORPUS, build_board  # noqa: E402
+
+from Wziqi_api import WuziqiAPI  # noqa: E402
+from Wziqi_api.transposition import shared_memory  # noqa: E402
+
+CASE = next(case for case in CORPUS if case["name"] == "middle-21")
+# 搜索深度上限足够大，只能靠停止、取消或时限结束
+DEEP = 20
+# 停止之后到返回结果允许的延迟（秒）
+MARGIN = 0.3
+
+ENGINES = {
+    "serial": {},
+    "root-parallel": {"workers": 2},
+    "smp": {"workers": 2, "parallel": "smp"},
+}
+
+
+@pytest.fixture(scope="module", params=list(ENGINES))
+def api(request):
+    if request.param == "smp" and shared_memory is None:
+        pytest.skip("Lazy SMP 需要 Python 3.8 及以上版本")
+    api = WuziqiAPI(threat_search=None, **ENGINES[request.param])
+    api._think(build_board(CASE), 1)  # 先创建进程池，不计入时间
+    yield api
+    api.close()
+
+
+def assert_legal(result, board):
+    (key, who), = result.items()
+    row, col = map(int, key.split(","))
+    assert who == "api" and board[row - 1, col - 1] == 0
+
+
+def test_stop_returns_best_move_so_far(api):
+    api.tt.clear()
+    board = build_board(CASE)
+
+    async def run():
+        task = asyncio.ensure_future(api.arunapi(board, auto_add=False,
+                                                 search_depth=DEEP, with_stats=True))
+        await asyncio.sleep(0.3)
+        start = time.perf_counter()
+        api.stop()
+        result, stats = await task
+        return result, stats, time.perf_counter() - start
+
+    result, stats, elapsed = asyncio.run(run())
+    assert elapsed < MARGIN
+    assert_legal(result, board)
+    assert stats.stage == "search" and 1 <= stats.depth < DEEP
+    assert api._stop is None
+
+
+def test_cancel_stops_search_thread(api):
+    """任务被取消时抛出取消异常，并且在搜索线程退出之后才抛出"""
+    api.tt.clear()
+    board = build_board(CASE)
+    executor = ThreadPoolExecutor(1)
+
+    async def run():
+        start = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(api.arunapi(board, search_depth=DEEP,
+                                               executor=executor), 0.3)
+        return time.perf_counter() - start
+
+    try:
+        assert asyncio.run(run()) < 0.3 + MARGIN
+        # 执行器唯一的线程已经空闲
+        assert executor.submit(int).result(timeout=0.05) == 0
+    finally:
+        executor.shutdown()
+    assert api._stop is None
+    assert (board == build_board(CASE)).all()  # 没有写回着法
+    # 之后的计算不受影响
+    assert_legal(asyncio.run(api.arunapi(board, auto_add=False, search_depth=2)),
+                 board)
+
+
+def test_time_limit(api):
+    api.tt.clear()
+    board = build_board(CASE)
+    time_limit_ms = 300
+    start = time.perf_counter()
+    result, stats = asyncio.run(api.arunapi(board, auto_add=False, search_depth=DEEP,
+                                            time_limit_ms=time_limit_ms,
+                                            with_stats=True))
+    assert time.perf_counter() - start < time_limit_ms / 1000 + MARGIN
+    assert_legal(result, board)
+    assert 1 <= stats.depth < DEEP
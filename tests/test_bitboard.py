@@ -0,0 +1,110 @@
+"""
+位棋盘的测试
+读写、五连和成五点检测与 NumPy 棋盘上的逐格检查结果相同，
+两种棋盘实现的引擎选出相同的着法。
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from benchmark import CORPUS, build_board  # noqa: E402
+
+from Wziqi_api import WuziqiAPI  # noqa: E402
+from Wziqi_api.bitboard import BitBoard  # noqa: E402
+
+SHAPES = [(15, 15), (19, 19), (9, 13)]
+
+
+def random_boards(rows, cols, count=30, seed=1):
+    """不同疏密的随机棋盘，较密的棋盘上会出现五连"""
+    rng = random.Random(seed)
+    for n in range(count):
+        density = 0.1 + 0.6 * n / count
+        values = [rng.choice((1, 2)) if rng.random() < density else 0
+                  for _ in range(rows * cols)]
+        yield np.array(values, dtype=np.int8).reshape(rows, cols)
+
+
+def five_cells(api, board, player):
+    """逐格检查该玩家落子即成五的空位（1索引）"""
+    cells = set()
+    for r, c in zip(*np.nonzero(board == 0)):
+        board[r, c] = player
+        if api._check_win_numpy(board, r, c, player):
+            cells.add((int(r) + 1, int(c) + 1))
+        board[r, c] = 0
+    return cells
+
+
+def bit_cells(bitboard, bits):
+    """位图中的格子（1索引）"""
+    cells = set()
+    while bits:
+        low = bits & -bits
+        r, c = divmod(low.bit_length() - 1, bitboard.stride)
+        cells.add((r + 1, c + 1))
+        bits ^= low
+    return cells
+
+
+@pytest.mark.parametrize("rows, cols", SHAPES)
+def test_matches_numpy(rows, cols):
+    api = WuziqiAPI(rows, cols)
+    for board in random_boards(rows, cols):
+        bitboard = BitBoard.from_array(board)
+        assert np.array_equal(bitboard.to_array(), board)
+        assert np.array_equal(np.asarray(bitboard), board)
+        assert bitboard.count() == np.count_nonzero(board)
+        assert bit_cells(bitboard, bitboard.empty()) == {
+            (int(r) + 1, int(c) + 1) for r, c in zip(*np.nonzero(board == 0))}
+        for p in range(0, rows * cols, 7):
+            r, c = divmod(p, cols)
+            assert bitboard[r, c] == board[r, c] == bitboard.item(p)
+
+        for player in (1, 2):
+            fives_at = {(int(r), int(c)) for r, c in zip(*np.nonzero(board == player))
+                        if api._check_win_numpy(board, r, c, player)}
+            assert bitboard.has_five(player) == bool(fives_at)
+            for r, c in zip(*np.nonzero(board == player)):
+                r, c = int(r), int(c)
+                assert bitboard.is_five_at(r, c, player) == ((r, c) in fives_at)
+
+            cells = five_cells(api, board, player)
+            assert bit_cells(bitboard, bitboard.winning_cells(player)) == cells
+            expected = api._find_winning_move_numpy(board, player)
+            assert bitboard.winning_move(player) == expected
+            assert expected == (min(cells) if cells else None)
+
+
+def test_set_and_copy():
+    board = np.zeros((15, 15), dtype=np.int8)
+    bitboard = BitBoard.from_array(board)
+    bitboard[0, 14] = 2
+    bitboard[1, 0] = 1
+    copy = bitboard.copy()
+    bitboard[0, 14] = 1
+    bitboard[1, 0] = 0
+    assert copy[0, 14] == 2 and copy[1, 0] == 1
+    assert bitboard[0, 14] == 1 and bitboard[1, 0] == 0
+    # 行末的边界位使 (0, 14) 和 (1, 0) 不会被当作相连
+    for c in range(11, 15):
+        bitboard[0, c] = 1
+    assert bitboard.winning_move(1) == (1, 11)
+    bitboard[...] = copy
+    assert np.array_equal(bitboard.to_array(), copy.to_array())
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[case["name"] for case in CORPUS])
+def test_engine_backends_agree(case):
+    size = case["size"]
+    moves = []
+    for backend in ("numpy", "bitboard"):
+        api = WuziqiAPI(size, size, 2, board_backend=backend, threat_search=None)
+        moves.append(api._think(build_board(case)))
+    assert moves[0] == moves[1]
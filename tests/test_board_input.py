@@ -0,0 +1,130 @@
+"""
+棋盘输入格式的测试
+_parse_board 对每种输入格式得到相同的棋盘，_add_move 把引擎的落子写回原来的对象。
+"""
+
+import numpy as np
+import pytest
+
+from Wziqi_api import WuziqiAPI
+from Wziqi_api.core import _add_move
+
+MOVES = [(8, 8), (8, 9), (9, 9), (7, 7)]
+
+
+@pytest.fixture
+def api():
+    return WuziqiAPI(search_depth=2, threat_search=None)
+
+
+@pytest.fixture
+def expected():
+    board = np.zeros((15, 15), dtype=np.int8)
+    for n, (row, col) in enumerate(MOVES):
+        board[row - 1, col - 1] = 1 if n % 2 == 0 else 2
+    return board
+
+
+def board_inputs(board):
+    """同一个局面的各种输入格式"""
+    QiPan = {f"{i},{j}": "None" for i in range(1, 16) for j in range(1, 16)}
+    for (r, c), value in np.ndenumerate(board):
+        if value:
+            QiPan[f"{r + 1},{c + 1}"] = "users" if value == 1 else "api"
+    return {
+        "dict": QiPan,
+        "dict-spaces": {f"{row}, {col}": ("users", "api")[n % 2]
+                        for n, (row, col) in enumerate(MOVES)},
+        "array": board.copy(),
+        "array-flat": board.ravel().copy(),
+        "array-int64": board.astype(np.int64),
+        "array-transposed": board.T.copy().T,
+        "bytes": board.tobytes(),
+        "bytearray": bytearray(board.tobytes()),
+        "memoryview": memoryview(board.tobytes()),
+        "moves": list(MOVES),
+        "moves-tuple": tuple(MOVES),
+        "moves-who": [(row, col, ("users", "api")[n % 2])
+                      for n, (row, col) in enumerate(MOVES)],
+    }
+
+
+@pytest.mark.parametrize("name", list(board_inputs(np.zeros((15, 15), dtype=np.int8))))
+def test_parse_board_formats(api, expected, name):
+    QiPan = board_inputs(expected)[name]
+    assert np.array_equal(api._parse_board(QiPan), expected)
+
+
+@pytest.mark.parametrize("QiPan", [
+    np.zeros((9, 25), dtype=np.int8),
+    np.zeros(224, dtype=np.int8),
+    np.zeros((15, 15, 1), dtype=np.int8),
+    bytes(10),
+    [(8, 8), (8, 8)],
+    [(0, 8)],
+    [(8, 16)],
+    [(8, 8, "nobody")],
+    b"0" * 225,
+    np.full((15, 15), 3, dtype=np.int8),
+    np.full((15, 15), -1, dtype=np.int8),
+    np.full(225, 258, dtype=np.int64),
+])
+def test_parse_board_rejects_invalid_input(api, QiPan):
+    with pytest.raises(ValueError):
+        api._parse_board(QiPan)
+
+
+def test_parse_board_uses_writable_int8_array_without_copy(api, expected):
+    board = expected.copy()
+    assert np.shares_memory(api._parse_board(board), board)
+    flat = expected.ravel().copy()
+    assert np.shares_memory(api._parse_board(flat), flat)
+
+
+@pytest.mark.parametrize("who", ["api", "users"])
+@pytest.mark.parametrize("name", ["dict", "array", "array-flat", "array-int64",
+                                  "array-transposed", "bytearray", "moves",
+                                  "moves-who"])
+def test_add_move_writes_back(api, expected, name, who):
+    """写回后再解析，新落子的颜色为落子方、其他棋子不变"""
+    QiPan = board_inputs(expected)[name]
+    _add_move(QiPan, 1, 2, 15, who)
+    board = api._parse_board(QiPan)
+    assert board[0, 1] == (1 if who == "users" else 2)
+    board[0, 1] = 0
+    assert np.array_equal(board, expected)
+
+
+@pytest.mark.parametrize("name", ["bytes", "memoryview", "moves-tuple"])
+def test_add_move_leaves_read_only_input(api, expected, name):
+    QiPan = board_inputs(expected)[name]
+    _add_move(QiPan, 1, 2, 15)
+    assert np.array_equal(api._parse_board(QiPan), expected)
+
+
+def test_add_move_to_move_list_keeps_colours():
+    """追加到着法列表时，按位置推不出落子方则写成三元组"""
+    moves = []
+    _add_move(moves, 8, 8, 15, "api")
+    assert moves == [(8, 8, "api")]
+    moves = [(8, 8)]
+    _add_move(moves, 8, 9, 15, "api")
+    assert moves == [(8, 8), (8, 9)]
+    _add_move(moves, 9, 9, 15, "api")
+    assert moves == [(8, 8), (8, 9), (9, 9, "api")]
+
+
+def test_runapi_auto_add_round_trip(api):
+    """auto_add 写回后，引擎的棋子在下一次解析中仍是引擎的"""
+    moves = []
+    for _ in range(3):
+        api.Runapi(moves)
+        board = api._parse_board(moves)
+        assert np.count_nonzero(board == 2) == len(moves)
+    board = np.zeros((15, 15), dtype=np.int8)
+    board[7, 7] = 1
+    transposed = board.T
+    result = api.Runapi(transposed)
+    (key, who), = result.items()
+    row, col = map(int, key.split(","))
+    assert transposed[row - 1, col - 1] == 2
@@ -0,0 +1,94 @@
+"""
+开局库的测试
+写入文件后按规范哈希查询得到相同的条目；引擎在旋转、翻转后的局面上也能命中开局库。
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from Wziqi_api import WuziqiAPI
+from Wziqi_api.book import OpeningBook, write_book
+from Wziqi_api.symmetry import canonical_key, to_canonical
+
+
+def test_write_and_probe_round_trip(tmp_path):
+    rng = random.Random(1)
+    entries = {rng.getrandbits(64): (rng.randint(1, 15), rng.randint(1, 15),
+                                     rng.randint(1, 9))
+               for _ in range(500)}
+    entries[0] = (8, 8, 4)  # 空棋盘的哈希为0，也要能保存
+    path = str(tmp_path / "test.book")
+    write_book(path, entries, 15, 15, max_stones=6)
+
+    book = OpeningBook(path)
+    try:
+        assert len(book) == len(entries)
+        assert (book.rows, book.cols, book.max_stones) == (15, 15, 6)
+        for key, entry in entries.items():
+            assert book.probe(key) == entry
+        assert dict(book.items()) == entries
+        missing = rng.getrandbits(64)
+        while missing in entries:
+            missing = rng.getrandbits(64)
+        assert book.probe(missing) is None
+    finally:
+        book.close()
+
+
+def test_rewrite_replaces_file(tmp_path):
+    path = str(tmp_path / "test.book")
+    write_book(path, {1: (1, 1, 1)})
+    write_book(path, {2: (2, 2, 2)})
+    book = OpeningBook(path)
+    assert dict(book.items()) == {2: (2, 2, 2)}
+    book.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.book"
+    path.write_bytes(b"not a book")
+    with pytest.raises(ValueError):
+        OpeningBook(str(path))
+
+
+def transform(move, k, flip, size=15):
+    """与 np.rot90(board, k)（再左右翻转）相同的着法变换，1索引"""
+    r, c = move[0] - 1, move[1] - 1
+    for _ in range(k):
+        r, c = size - 1 - c, r
+    if flip:
+        c = size - 1 - c
+    return r + 1, c + 1
+
+
+def test_engine_uses_book_for_symmetric_positions(tmp_path):
+    """库中保存规范局面的着法，旋转、翻转后的局面得到对应变换后的着法"""
+    board = np.zeros((15, 15), dtype=np.int8)
+    board[7, 7], board[7, 8], board[8, 9] = 1, 2, 1
+    key, t = canonical_key(board)
+    move = (10, 11)
+    path = str(tmp_path / "test.book")
+    write_book(path, {key: to_canonical(move, t, 15, 15) + (5,)}, 15, 15, max_stones=3)
+
+    api = WuziqiAPI(search_depth=2, opening_book=path, threat_search=None)
+    try:
+        for k in range(4):
+            for flip in (False, True):
+                variant = np.rot90(board, k)
+                if flip:
+                    variant = np.fliplr(variant)
+                variant = np.ascontiguousarray(variant)
+                assert canonical_key(variant)[0] == key
+                assert api._think(variant) == transform(move, k, flip)
+                assert api.stats.stage == "book"
+    finally:
+        api.book.close()
+
+
+def test_engine_rejects_book_of_other_size(tmp_path):
+    path = str(tmp_path / "test.book")
+    write_book(path, {1: (1, 1, 1)}, 19, 19)
+    with pytest.raises(ValueError):
+        WuziqiAPI(opening_book=path)
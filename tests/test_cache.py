@@ -0,0 +1,101 @@
+"""
+结果缓存的测试
+按 max_bytes 以最近使用顺序淘汰，更深的结果回答较浅的请求，
+因时限而中止的结果只回答时限不超过它的请求，不同配置的引擎不共用条目。
+"""
+
+import numpy as np
+
+from Wziqi_api import WuziqiAPI
+from Wziqi_api.cache import ResultCache
+
+CONFIG = (15, 15)
+
+
+def test_lru_eviction_under_max_bytes():
+    cache = ResultCache(max_bytes=1 << 30)
+    cache.store(CONFIG, 1, 2, 3, None, (8, 8), 1.0)
+    entry_bytes = cache.nbytes
+    cache = ResultCache(max_bytes=entry_bytes * 3)
+    for key in range(1, 4):
+        cache.store(CONFIG, key, 2, 3, None, (8, 8), 1.0)
+    assert len(cache) == 3
+    assert cache.get(CONFIG, 1, 2, 3) is not None  # 1 变为最近使用
+    cache.store(CONFIG, 4, 2, 3, None, (8, 8), 1.0)
+    assert len(cache) == 3 and cache.nbytes <= cache.max_bytes
+    assert cache.get(CONFIG, 2, 2, 3) is None
+    for key in (1, 3, 4):
+        assert cache.get(CONFIG, key, 2, 3) is not None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (4, 1, 3)
+
+
+def test_deeper_answers_shallower():
+    cache = ResultCache()
+    cache.store(CONFIG, 1, 2, 5, None, (8, 8), 1.0)
+    assert cache.get(CONFIG, 1, 2, 3) == ((8, 8), 1.0)
+    assert cache.get(CONFIG, 1, 2, 5) == ((8, 8), 1.0)
+    assert cache.get(CONFIG, 1, 2, 6) is None
+    assert cache.get(CONFIG, 1, 1, 3) is None
+    # 较浅的结果不覆盖已有的更深结果
+    cache.store(CONFIG, 1, 2, 2, None, (9, 9), 2.0)
+    assert cache.get(CONFIG, 1, 2, 5) == ((8, 8), 1.0)
+    cache.store(CONFIG, 1, 2, 7, None, (9, 9), 2.0)
+    assert cache.get(CONFIG, 1, 2, 7) == ((9, 9), 2.0)
+
+
+def test_time_limited_results():
+    """因时限而中止的结果可以回答时限不超过它的限时请求，按深度请求时只看完成的深度"""
+    cache = ResultCache()
+    cache.store(CONFIG, 1, 2, 4, 500, (8, 8), 1.0)
+    assert cache.get(CONFIG, 1, 2, 10, 500) == ((8, 8), 1.0)
+    assert cache.get(CONFIG, 1, 2, 10, 400) == ((8, 8), 1.0)
+    assert cache.get(CONFIG, 1, 2, 10, 600) is None
+    assert cache.get(CONFIG, 1, 2, 10) is None
+    assert cache.get(CONFIG, 1, 2, 4) == ((8, 8), 1.0)
+    # 没有时限的结果只按深度回答限时请求
+    cache.store(CONFIG, 2, 2, 4, None, (8, 8), 1.0)
+    assert cache.get(CONFIG, 2, 2, 10, 100) is None
+
+
+def test_config_is_part_of_the_key():
+    cache = ResultCache()
+    cache.store((15, 15), 1, 2, 5, None, (8, 8), 1.0)
+    assert cache.get((19, 19), 1, 2, 3) is None
+    assert cache.get((15, 15), 1, 2, 3) == ((8, 8), 1.0)
+
+
+def middle_board():
+    board = np.zeros((15, 15), dtype=np.int8)
+    for n, (r, c) in enumerate([(7, 7), (7, 8), (8, 8), (6, 6), (8, 6), (9, 9)]):
+        board[r, c] = 1 if n % 2 == 0 else 2
+    return board
+
+
+def test_engines_share_cache_only_with_same_settings():
+    cache = ResultCache()
+    first = WuziqiAPI(search_depth=2, threat_search=None, result_cache=cache)
+    expected = first._think(middle_board())
+    assert first.stats.stage == "search"
+
+    same = WuziqiAPI(search_depth=2, threat_search=None, result_cache=cache)
+    assert same._think(middle_board()) == expected
+    assert same.stats.stage == "cache"
+    # 旋转后的局面命中同一条目，着法随之旋转
+    row, col = same._think(np.ascontiguousarray(np.rot90(middle_board())))
+    assert same.stats.stage == "cache"
+    assert (col, 15 + 1 - row) == expected  # np.rot90 把 (r, c) 移到 (16 - c, r)
+
+    for options in ({"lmr_moves": 3}, {"futility_margin": 100},
+                    {"threat_search": "vct"}, {"move_radius": 1}):
+        other = WuziqiAPI(search_depth=2, **dict({"threat_search": None}, **options),
+                          result_cache=cache)
+        other._think(middle_board())
+        assert other.stats.stage != "cache"
+
+    other_size = WuziqiAPI(19, 19, search_depth=2, threat_search=None,
+                           result_cache=cache)
+    board = np.zeros((19, 19), dtype=np.int8)
+    board[:15, :15] = middle_board()
+    other_size._think(board)
+    assert other_size.stats.stage != "cache"
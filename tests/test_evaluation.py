@@ -0,0 +1,108 @@
+"""
+评估函数的一致性测试
+逐格检查的原始实现（scalar）、NumPy向量化实现（vectorized）和搜索中的增量评估
+在随机棋盘上的得分应当完全相同；落子/撤销后增量状态应与重新初始化的结果一致。
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from Wziqi_api import WuziqiAPI
+
+
+def random_board(rng, rows, cols, stones):
+    """随机摆放stones个棋子（双方各约一半）的棋盘"""
+    board = np.zeros((rows, cols), dtype=np.int8)
+    cells = rng.sample(range(rows * cols), stones)
+    for n, p in enumerate(cells):
+        board.flat[p] = 1 if n % 2 == 0 else 2
+    return board
+
+
+def eval_state(api):
+    """增量评估和候选着法状态的快照"""
+    return (list(api._codes), api._ai_total, api._user_total, list(api._cells),
+            {radius: set(candidates) for radius, candidates in api._candidates.items()},
+            {radius: list(near) for radius, near in api._near.items()})
+
+
+@pytest.mark.parametrize("rows, cols", [(15, 15), (9, 13)])
+def test_scalar_and_vectorized_scores_match(rows, cols):
+    """两种整盘评估实现对每个玩家和总分的结果相同"""
+    rng = random.Random(rows * 100 + cols)
+    scalar = WuziqiAPI(rows, cols, eval_backend="scalar")
+    vectorized = WuziqiAPI(rows, cols, eval_backend="vectorized")
+    for stones in (0, 1, 5, 20, 40, 80):
+        for _ in range(3):
+            board = random_board(rng, rows, cols, stones)
+            for player in (1, 2):
+                assert (scalar._evaluate_player_numpy(board, player)
+                        == vectorized._evaluate_player_numpy(board, player))
+            assert (scalar._evaluate_board_numpy(board)
+                    == vectorized._evaluate_board_numpy(board))
+
+
+def test_vectorized_batch_matches_single_boards():
+    """向量化实现一次评估一批棋盘，与逐个评估的结果相同"""
+    rng = random.Random(3)
+    api = WuziqiAPI()
+    boards = np.stack([random_board(rng, 15, 15, stones) for stones in range(0, 60, 6)])
+    scores = api._evaluate_board_numpy(boards)
+    assert list(scores) == [api._evaluate_board_numpy(board) for board in boards]
+
+
+def test_incremental_score_follows_make_and_unmake():
+    """落子/撤销过程中增量总分始终等于整盘评估，全部撤销后状态恢复原样"""
+    rng = random.Random(7)
+    api = WuziqiAPI(shrink_radius_at=10)
+    for _ in range(5):
+        board = random_board(rng, 15, 15, rng.randrange(1, 30))
+        api._init_search_state(board)
+        initial_board = board.copy()
+        initial = eval_state(api)
+
+        made = []
+        for _ in range(25):
+            empty = np.flatnonzero(board == 0).tolist()
+            p = rng.choice(empty)
+            r, c = divmod(p, 15)
+            api._make_move(board, r, c, rng.choice((1, 2)))
+            made.append((r, c))
+            assert api._leaf_score(board) == api._evaluate_board_numpy(board)
+        for r, c in reversed(made):
+            api._unmake_move(board, r, c)
+            assert api._leaf_score(board) == api._evaluate_board_numpy(board)
+
+        assert np.array_equal(board, initial_board)
+        assert eval_state(api) == initial
+
+
+def test_incremental_state_matches_rebuild():
+    """落子后的增量状态与按新棋盘重新初始化的状态相同"""
+    rng = random.Random(11)
+    api = WuziqiAPI()
+    board = random_board(rng, 15, 15, 12)
+    api._init_search_state(board)
+    for _ in range(20):
+        p = rng.choice(np.flatnonzero(board == 0).tolist())
+        api._make_move(board, p // 15, p % 15, rng.choice((1, 2)))
+    incremental = eval_state(api)
+    api._init_search_state(board)
+    assert eval_state(api) == incremental
+
+
+@pytest.mark.parametrize("eval_backend", ["scalar", "vectorized"])
+def test_search_result_does_not_depend_on_evaluator(eval_backend):
+    """增量评估与整盘评估下的搜索结果相同"""
+    rng = random.Random(5)
+    for _ in range(3):
+        board = random_board(rng, 15, 15, 10)
+        board[7, 7] = board[7, 7] or 1
+        moves = []
+        for incremental_eval in (True, False):
+            api = WuziqiAPI(search_depth=2, eval_backend=eval_backend,
+                            threat_search=None, incremental_eval=incremental_eval)
+            moves.append(api._think(board.copy()))
+        assert moves[0] == moves[1]
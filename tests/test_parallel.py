@@ -0,0 +1,60 @@
+"""
+根节点并行搜索的测试
+根节点并行搜索选出的着法应与单进程按顺序搜索的着法相同（基准测试的局面集合）。
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from benchmark import CORPUS, build_board  # noqa: E402
+
+from Wziqi_api import WuziqiAPI  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def parallel_api():
+    """按棋盘大小取得根节点并行搜索的引擎，同样大小的局面共用一个进程池"""
+    engines = {}
+
+    def get(size):
+        if size not in engines:
+            engines[size] = WuziqiAPI(size, size, workers=2, threat_search=None)
+        # 同一局面更深的根结果会直接回答较浅的请求，每次比较前清空置换表
+        engines[size].tt.clear()
+        return engines[size]
+
+    yield get
+    for api in engines.values():
+        api.close()
+
+
+@pytest.mark.parametrize("depth", [2, 3])
+@pytest.mark.parametrize("case", CORPUS, ids=[case["name"] for case in CORPUS])
+def test_root_parallel_matches_serial(parallel_api, case, depth):
+    size = case["size"]
+    serial = WuziqiAPI(size, size, depth, threat_search=None)
+    expected = serial._think(build_board(case))
+    assert parallel_api(size)._think(build_board(case), depth) == expected
+
+
+@pytest.mark.parametrize("name", ["middle-19", "middle-21"])
+def test_root_parallel_respects_time_limit(parallel_api, name):
+    """
+    限时的根节点并行搜索在时限内返回空位上的着法
+    排队的根着法也按同一个时限停止，不会各自重新得到完整的时间
+    """
+    case = next(case for case in CORPUS if case["name"] == name)
+    board = build_board(case)
+    api = parallel_api(case["size"])
+    api._think(board.copy(), 1)  # 先创建进程池，不计入时间
+    time_limit_ms = 500
+    start = time.perf_counter()
+    row, col = api._think(board.copy(), 10, time_limit_ms=time_limit_ms)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    assert board[row - 1, col - 1] == 0
+    assert elapsed_ms < time_limit_ms + 150
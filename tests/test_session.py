@@ -0,0 +1,129 @@
+"""
+GameSession 的测试
+落子、悔棋之后会话增量维护的棋盘、哈希、候选着法、评估状态和成五点
+应与从头重建的结果一致，
+计算出的着法应与 Runapi 对同一棋盘的结果相同。
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from Wziqi_api import GameSession, WuziqiAPI
+
+
+def rebuilt_state(session):
+    """按会话的着法从头重建的 (棋盘, 哈希, 增量状态)"""
+    api = WuziqiAPI(session.rows, session.cols)
+    board = np.zeros((session.rows, session.cols), dtype=np.int8)
+    for row, col, who in session.moves:
+        board[row - 1, col - 1] = 1 if who == "users" else 2
+    api._init_search_state(board)
+    return board, api._hash_board(board), state(api)
+
+
+def state(api):
+    """增量评估和候选着法状态的快照"""
+    return (list(api._codes), api._ai_total, api._user_total, list(api._cells),
+            {radius: set(candidates) for radius, candidates in api._candidates.items()})
+
+
+def session_board(session):
+    """会话的棋盘（NumPy数组）"""
+    if session.api.board_backend == "bitboard":
+        return session.board.to_array()
+    return session.board
+
+
+def assert_consistent(session):
+    board, key, expected = rebuilt_state(session)
+    assert np.array_equal(session_board(session), board)
+    assert session.key == key
+    assert state(session.api) == expected
+    # 增量维护的成五点与整盘扫描的结果相同
+    reference = WuziqiAPI(session.rows, session.cols)
+    for player in (1, 2):
+        expected_five = reference._find_winning_move_numpy(board, player)
+        assert session._five_move(player) == expected_five
+
+
+def random_reply(rng, session):
+    """在已有棋子附近随机选一个空位"""
+    board = session_board(session)
+    empty = [(int(r) + 1, int(c) + 1) for r, c in zip(*np.nonzero(board == 0))
+             if any(abs(r + 1 - row) <= 2 and abs(c + 1 - col) <= 2
+                    for row, col, _ in session.moves)]
+    return rng.choice(empty)
+
+
+@pytest.mark.parametrize("board_backend", ["numpy", "bitboard"])
+def test_play_and_undo_match_rebuild(board_backend):
+    rng = random.Random(1)
+    session = GameSession(search_depth=2, threat_search=None,
+                          board_backend=board_backend)
+    session.play(8, 8, "users")
+    for ply in range(24):
+        if session.winner is not None:
+            break
+        if ply % 2:
+            session.play(*random_reply(rng, session), "users")
+        else:
+            session.best_move(auto_play=True)
+        assert_consistent(session)
+        if ply % 7 == 6:
+            for _ in range(3):
+                session.undo()
+            assert_consistent(session)
+    while session.moves:
+        session.undo()
+    assert_consistent(session)
+    assert session.key == 0
+
+
+def test_best_move_matches_runapi():
+    rng = random.Random(2)
+    session = GameSession(search_depth=2, threat_search=None)
+    reference = WuziqiAPI(search_depth=2, threat_search=None)
+    session.play(8, 8, "users")
+    for _ in range(8):
+        move = session.best_move()
+        assert move == reference._think(session.to_qipan())
+        session.play(*move, "api")
+        if session.winner is not None:
+            break
+        session.play(*random_reply(rng, session), "users")
+        if session.winner is not None:
+            break
+
+
+def test_best_move_for_users_matches_runapi():
+    session = GameSession(search_depth=2, threat_search=None)
+    for row, col, who in [(8, 8, "users"), (8, 9, "api"), (9, 9, "users"),
+                          (7, 7, "api")]:
+        session.play(row, col, who)
+    reference = WuziqiAPI(search_depth=2, threat_search=None)
+    expected = reference._think(session.to_qipan(), who="users")
+    assert session.best_move(who="users") == expected
+    assert_consistent(session)
+
+
+def test_winner_and_invalid_moves():
+    session = GameSession()
+    for col in range(1, 5):
+        session.play(8, col, "users")
+        session.play(9, col, "api")
+    assert session.winner is None
+    with pytest.raises(ValueError):
+        session.play(8, 1, "api")
+    with pytest.raises(ValueError):
+        session.play(0, 1, "api")
+    with pytest.raises(ValueError):
+        session.play(1, 1, "nobody")
+    session.play(8, 5, "users")
+    assert session.winner == "users"
+    assert session.best_move() is None
+    with pytest.raises(ValueError):
+        session.play(1, 1, "api")
+    assert session.undo() == (8, 5, "users")
+    assert session.winner is None
@@ -0,0 +1,103 @@
+"""
+棋盘对称变换的测试
+变换与逆变换互逆、构成一个群，变换后的局面得到相同的规范哈希，
+引擎增量维护的各变换下的哈希与从头计算的结果一致。
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from Wziqi_api import WuziqiAPI
+from Wziqi_api.symmetry import (canonical_key, cell_maps, from_canonical, inverse_maps,
+                                symmetric_keys, to_canonical)
+
+SHAPES = [(15, 15), (19, 19), (9, 13), (13, 9)]
+
+
+def transform_board(board, cells):
+    """按变换把棋盘上的每个格子p移到 cells[p]"""
+    out = np.zeros(board.size, dtype=board.dtype)
+    out[list(cells)] = board.ravel()
+    return out.reshape(board.shape)
+
+
+def random_board(rng, rows, cols, stones=20):
+    board = np.zeros((rows, cols), dtype=np.int8)
+    for n, p in enumerate(rng.sample(range(rows * cols), stones)):
+        board.flat[p] = 1 if n % 2 == 0 else 2
+    return board
+
+
+@pytest.mark.parametrize("rows, cols", SHAPES)
+def test_inverse_maps(rows, cols):
+    maps, inverse = cell_maps(rows, cols), inverse_maps(rows, cols)
+    assert len(maps) == (8 if rows == cols else 4)
+    assert maps[0] == tuple(range(rows * cols))
+    for t, cells in enumerate(maps):
+        assert sorted(cells) == list(range(rows * cols))
+        for p in range(rows * cols):
+            assert inverse[t][cells[p]] == p
+            assert cells[inverse[t][p]] == p
+
+
+@pytest.mark.parametrize("rows, cols", SHAPES)
+def test_maps_form_a_group(rows, cols):
+    """任意两个变换的复合仍是其中之一，且与 NumPy 的旋转、翻转一一对应"""
+    maps = cell_maps(rows, cols)
+    for first in maps:
+        for second in maps:
+            assert tuple(second[q] for q in first) in maps
+
+    board = np.arange(rows * cols).reshape(rows, cols)
+    variants = [board, np.flipud(board), np.fliplr(board), np.rot90(board, 2)]
+    if rows == cols:
+        variants += [np.rot90(variant) for variant in variants]
+    expected = {tuple(np.ascontiguousarray(v).ravel().tolist()) for v in variants}
+    # 变换后位置 cells[p] 上的格子来自原位置 p
+    actual = {tuple(np.argsort(cells).tolist()) for cells in maps}
+    assert actual == expected
+
+
+@pytest.mark.parametrize("rows, cols", SHAPES)
+def test_canonical_key_is_invariant(rows, cols):
+    rng = random.Random(rows * 100 + cols)
+    board = random_board(rng, rows, cols)
+    key, t = canonical_key(board)
+    move = (rng.randint(1, rows), rng.randint(1, cols))
+    canonical_move = to_canonical(move, t, rows, cols)
+    assert from_canonical(canonical_move, t, rows, cols) == move
+    for cells in cell_maps(rows, cols):
+        variant = transform_board(board, cells)
+        variant_key, variant_t = canonical_key(variant)
+        assert variant_key == key
+        # 对应的着法在规范局面中落在同一个格子上
+        p = (move[0] - 1) * cols + move[1] - 1
+        variant_move = cells[p] // cols + 1, cells[p] % cols + 1
+        assert to_canonical(variant_move, variant_t, rows, cols) == canonical_move
+
+
+@pytest.mark.parametrize("rows, cols", [(15, 15), (9, 13)])
+def test_incremental_sym_keys_match_rebuild(rows, cols):
+    """落子、撤销以及一次完整的搜索之后，增量维护的哈希与从头计算的相同"""
+    rng = random.Random(3)
+    api = WuziqiAPI(rows, cols, search_depth=2, canonical_tt=True, threat_search=None)
+    board = random_board(rng, rows, cols, stones=6)
+    api._init_search_state(board)
+    played = []
+    for n in range(30):
+        if played and n % 4 == 3:
+            r, c = played.pop()
+            api._unmake_move(board, r, c)
+        else:
+            r, c = divmod(rng.choice(np.flatnonzero(board == 0).tolist()), cols)
+            api._make_move(board, r, c, 1 + n % 2)
+            played.append((r, c))
+        assert api._sym_keys == symmetric_keys(board)
+
+    before = list(api._sym_keys)
+    stones = int(np.count_nonzero(board))
+    api._init_ordering_state(stones, 2)
+    api._search_root(board, 2, api._hash_board(board), stones, True)
+    assert api._sym_keys == before == symmetric_keys(board)
@@ -0,0 +1,159 @@
+"""
+威胁空间搜索（VCF/VCT）的测试
+已知的连续冲四取胜、需要活三的取胜和没有取胜路线的局面，
+以及引擎在对方有取胜路线时只保留能化解它的着法。
+"""
+
+import time
+
+import numpy as np
+
+from Wziqi_api import WuziqiAPI
+from Wziqi_api.threats import ThreatSolver
+
+# 进攻方（2）在(4,6)冲四逼对方挡在(4,5)，再在(5,6)走出双冲四
+VCF_POSITION = {
+    2: [(4, 7), (4, 8), (4, 9), (5, 3), (5, 4), (5, 5), (6, 6), (7, 6)],
+    1: [(4, 10), (5, 2), (8, 6), (15, 15)],
+}
+# 进攻方只有两组活二，没有冲四；在交点落子形成双活三
+VCT_POSITION = {
+    2: [(8, 7), (8, 8), (6, 9), (7, 9)],
+    1: [(1, 1), (1, 3), (15, 15), (3, 14)],
+}
+QUIET_POSITION = {
+    2: [(8, 8), (10, 10)],
+    1: [(8, 9), (9, 8)],
+}
+
+
+def make_board(position, swap=False):
+    board = np.zeros((15, 15), dtype=np.int8)
+    for player, moves in position.items():
+        for row, col in moves:
+            board[row - 1, col - 1] = 3 - player if swap else player
+    return board
+
+
+def five_cells(board, player):
+    """该玩家落子即成五的空位数"""
+    api = WuziqiAPI()
+    count = 0
+    for r, c in zip(*np.nonzero(board == 0)):
+        board[r, c] = player
+        count += api._check_win_numpy(board, r, c, player)
+        board[r, c] = 0
+    return count
+
+
+def play_line(board, line, player):
+    """按取胜路线交替落子（进攻方先走），返回走完后的棋盘"""
+    board = board.copy()
+    for n, (row, col) in enumerate(line):
+        assert board[row - 1, col - 1] == 0
+        board[row - 1, col - 1] = player if n % 2 == 0 else 3 - player
+    return board
+
+
+def test_vcf_found():
+    board = make_board(VCF_POSITION)
+    solver = ThreatSolver()
+    line = solver.solve(board, 2, max_depth=8, vct=False)
+    assert line == [(4, 6), (4, 5), (5, 6)] and not solver.exhausted
+    # 先冲四、对方挡，最后一手形成两个成五点
+    assert len(line) >= 3 and len(line) % 2 == 1
+    end = play_line(board, line, 2)
+    assert five_cells(end, 2) >= 2
+    for n in range(0, len(line) - 1, 2):
+        # 每一步冲四之后对方只能挡在唯一的成五点上
+        partial = play_line(board, line[:n + 1], 2)
+        assert five_cells(partial, 2) == 1
+
+
+def test_vct_needs_threes():
+    board = make_board(VCT_POSITION)
+    solver = ThreatSolver()
+    assert solver.solve(board, 2, max_depth=8, vct=False) is None
+    assert not solver.exhausted
+    line = solver.solve(board, 2, max_depth=8, vct=True)
+    assert line is not None and not solver.exhausted
+    assert line[0] == (8, 9)
+    end = play_line(board, line, 2)
+    assert five_cells(end, 2) >= 2
+
+
+def test_no_win():
+    board = make_board(QUIET_POSITION)
+    solver = ThreatSolver()
+    for player in (1, 2):
+        assert solver.solve(board, player, max_depth=8, vct=True) is None
+        assert not solver.exhausted
+
+
+def test_immediate_five():
+    """已有冲四时直接成五"""
+    board = make_board(VCF_POSITION)
+    board[3, 5] = 2
+    assert ThreatSolver().solve(board, 2, vct=False) == [(4, 5)]
+
+
+def test_budget_exhausted():
+    """预算用完时返回None并设置 exhausted，下一次搜索重新计算"""
+    board = make_board(VCT_POSITION)
+    solver = ThreatSolver()
+    assert solver.solve(board, 2, vct=True, max_nodes=1) is None
+    assert solver.exhausted
+    assert solver.solve(board, 2, vct=True) is not None
+    assert not solver.exhausted
+
+
+def refutes(board, move, vct):
+    """AI走move之后用户不再有取胜路线（且不是因为预算用完）"""
+    board = board.copy()
+    board[move[0] - 1, move[1] - 1] = 2
+    solver = ThreatSolver()
+    line = solver.solve(board, 1, max_depth=8, vct=vct)
+    return line is None and not solver.exhausted
+
+
+def threat_defences(api, board, deadline):
+    stones = int(np.count_nonzero(board))
+    api._init_search_state(board)
+    api._init_ordering_state(stones, 1)
+    return api._threat_defences(board, stones, deadline)
+
+
+def test_threat_defences_keep_only_refutations():
+    """
+    用户有连续冲四取胜时只保留能化解它的着法
+    候选着法中能化解的着法也不会被遗漏
+    """
+    board = make_board(VCF_POSITION, swap=True)
+    api = WuziqiAPI(threat_search="vcf", threat_time_ms=10000)
+    defences = threat_defences(api, board, time.perf_counter() + 10)
+    assert defences
+    candidates = api._candidate_moves(board, int(np.count_nonzero(board)))
+    for move in candidates:
+        assert (move in defences) == refutes(board, move, vct=False)
+
+
+def test_threat_defences_without_user_line():
+    board = make_board(QUIET_POSITION)
+    api = WuziqiAPI(threat_search="vct")
+    assert threat_defences(api, board, time.perf_counter() + 10) is None
+
+
+def test_threat_defences_out_of_budget():
+    """预算用完时不返回未经验证的着法"""
+    board = make_board(VCF_POSITION, swap=True)
+    api = WuziqiAPI(threat_search="vcf")
+    assert threat_defences(api, board, time.perf_counter()) is None
+    api = WuziqiAPI(threat_search="vcf", threat_nodes=1)
+    assert threat_defences(api, board, time.perf_counter() + 10) is None
+
+
+def test_engine_plays_threat_line():
+    board = make_board(VCF_POSITION)
+    api = WuziqiAPI(search_depth=2)
+    assert api._think(board) == (4, 6)
+    assert api.stats.stage == "threat"
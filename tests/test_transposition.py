@@ -0,0 +1,114 @@
+"""
+共享置换表的测试
+条目打包后读回相同的值，替换和老化规则与 TranspositionTable 相同，
+不完整的条目按未命中处理，创建者关闭时释放共享内存。
+"""
+
+import pickle
+
+import pytest
+
+from Wziqi_api.transposition import (EXACT, LOWER, UPPER, SharedTranspositionTable,
+                                     TranspositionTable, shared_memory)
+
+pytestmark = pytest.mark.skipif(shared_memory is None,
+                                reason="共享内存需要 Python 3.8 及以上版本")
+
+
+@pytest.fixture
+def table():
+    table = SharedTranspositionTable(1 << 8)
+    yield table
+    if table.entries is not None:
+        table.close()
+
+
+@pytest.mark.parametrize("depth", [0, 1, 9, 255])
+@pytest.mark.parametrize("flag", [EXACT, LOWER, UPPER])
+@pytest.mark.parametrize("move", [None, (1, 1), (15, 15), (19, 19), (15, 19)])
+def test_store_and_probe_round_trip(table, depth, flag, move):
+    key = 0x9E3779B97F4A7C15
+    table.store(key, depth, -123.5, flag, move)
+    assert table.probe(key) == (depth, -123.5, flag, move)
+    assert len(table) == 1
+
+
+def test_generation_round_trip(table):
+    for _ in range(300):
+        table.new_search()
+    assert table.generation == 300 & 0xFF
+    table.store(5, 3, 1.0, EXACT, (19, 1))
+    assert table.probe(5) == (3, 1.0, EXACT, (19, 1))
+
+
+def test_other_key_in_same_slot_misses(table):
+    table.store(7, 4, 2.0, EXACT, (8, 8))
+    assert table.probe(7 + table.size) is None
+
+
+@pytest.mark.parametrize("table_type", [TranspositionTable, SharedTranspositionTable])
+def test_replacement_and_aging(table_type):
+    """槽位冲突时只有更深或同一局面的结果覆盖，旧一轮搜索的条目总会被覆盖"""
+    table = table_type(1 << 8)
+    try:
+        a, b = 3, 3 + table.size
+        table.new_search()
+        table.store(a, 5, 1.0, EXACT, (8, 8))
+        table.store(b, 4, 2.0, EXACT, (9, 9))
+        assert table.probe(a) == (5, 1.0, EXACT, (8, 8))
+        assert table.probe(b) is None
+        # 同一局面总是覆盖，即使更浅
+        table.store(a, 2, 3.0, LOWER, (7, 7))
+        assert table.probe(a) == (2, 3.0, LOWER, (7, 7))
+        table.store(b, 2, 4.0, UPPER, None)
+        assert table.probe(b) == (2, 4.0, UPPER, None)
+        assert table.probe(a) is None
+        # 新一轮搜索中旧条目即使更深也会被覆盖
+        table.store(a, 9, 5.0, EXACT, (1, 1))
+        table.new_search()
+        table.store(b, 1, 6.0, EXACT, (2, 2))
+        assert table.probe(b) == (1, 6.0, EXACT, (2, 2))
+    finally:
+        if table_type is SharedTranspositionTable:
+            table.close()
+
+
+def test_torn_entry_is_rejected(table):
+    """其他进程写到一半的条目（check 与 data、score 不符）按未命中处理"""
+    key = 0x123456789ABCDEF
+    index = key & table.mask
+    table.store(key, 6, 10.0, EXACT, (15, 19))
+    table._score[index] = 11.0
+    assert table.probe(key) is None
+
+    table.clear()
+    table.store(key, 6, 10.0, EXACT, (15, 19))
+    table._data[index] = table._pack(7, EXACT, (15, 19), table.generation)
+    assert table.probe(key) is None
+
+    table.clear()
+    table.store(key, 6, 10.0, EXACT, (15, 19))
+    table._check[index] ^= 1 << 63
+    assert table.probe(key) is None
+
+
+def test_attached_copy_shares_entries(table):
+    other = pickle.loads(pickle.dumps(table))
+    try:
+        assert not other.owner and other.name == table.name
+        table.store(11, 3, 1.5, LOWER, (2, 3))
+        assert other.probe(11) == (3, 1.5, LOWER, (2, 3))
+        other.new_search()
+        assert table.generation == 1
+    finally:
+        other.close()
+    # 连接方关闭时不释放共享内存
+    assert table.probe(11) == (3, 1.5, LOWER, (2, 3))
+
+
+def test_close_unlinks_segment():
+    table = SharedTranspositionTable(1 << 8)
+    name = table.name
+    table.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)